@@ -0,0 +1,137 @@
+"""Time blitting many sprites one call at a time and in batches.
+
+Run from the top-level directory:
+
+    python bench/blits.py [number of frames]
+
+For 1000 and 10000 small sprites, this first times blitting each of them once,
+with a ``Surface.blit`` call per sprite, with :func:`blit_many` and through a
+:class:`BlitBatch`.  It then times drawing frames with fastdraw, as
+:class:`GraphicsManager <engine.gfx.container.GraphicsManager>` does, with a
+tenth of the sprites moving each frame, in three ways:
+
+- 'blit loop': graphics call ``Surface.blit`` once per rect, as they used to;
+- 'blits per graphic': graphics call :func:`blit_many` on the surface;
+- 'BlitBatch': graphics' blits are all drawn with one call per frame.
+
+Sprites are 4x4 so that time is mostly spent in Python rather than blitting.
+
+"""
+
+import sys
+import os
+import random
+from time import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame as pg
+
+from game.engine.gfx import Sprite, Colour, graphic, graphics, _fastdraw
+from game.engine.gfx.util import blit_many, BlitBatch
+try:
+    from game.engine.gfx import _gm
+except ImportError:
+    _gm = None
+
+SIZE = (800, 600)
+
+
+def blit_loop (dest, blits):
+    """Blit surfaces with one ``Surface.blit`` call each."""
+    blit = dest.blit
+    for args in blits:
+        blit(*args)
+
+
+def time_calls (n, frames):
+    """Time blitting n surfaces in various ways, returning seconds per frame
+for each."""
+    rand = random.Random(0)
+    src = pg.Surface((4, 4))
+    sfc = pg.Surface(SIZE)
+    blits = [(src, (rand.randrange(SIZE[0]), rand.randrange(SIZE[1])),
+              None, 0) for i in xrange(n)]
+
+    def batch (dest, blits):
+        b = BlitBatch(dest)
+        for args in blits:
+            b.blit(*args)
+        b.flush()
+
+    ts = []
+    for f in (blit_loop, blit_many, batch):
+        t0 = time()
+        for frame in xrange(frames):
+            f(sfc, blits)
+        ts.append((time() - t0) / frames)
+    return ts
+
+
+def draw_frames (n, frames, draw):
+    """Time drawing frames, returning seconds per frame.
+
+draw_frames(n, frames, draw) -> t
+
+:arg n: number of sprites.
+:arg frames: number of frames to draw.
+:arg draw: function taking ``(fastdraw_args, sfc)`` to draw a frame.
+
+"""
+    rand = random.Random(0)
+    src = pg.Surface((4, 4))
+    sprites = [Sprite(src, (rand.randrange(SIZE[0] - 4),
+                            rand.randrange(SIZE[1] - 4)))
+               for i in xrange(n)]
+    layers = [0, 1]
+    gs = {0: sprites, 1: [Colour((0, 0, 0), ((0, 0), SIZE))]}
+    sfc = pg.Surface(SIZE)
+    fastdraw = _fastdraw.fastdraw if _gm is None else _gm.fastdraw
+    draw(lambda dest: fastdraw(layers, dest, gs, []), sfc)
+    t = 0
+    for frame in xrange(frames):
+        for s in rand.sample(sprites, n // 10):
+            s.move_by(rand.randint(-2, 2), rand.randint(-2, 2))
+        t0 = time()
+        draw(lambda dest: fastdraw(layers, dest, gs, []), sfc)
+        t += time() - t0
+    return t / frames
+
+
+def draw_direct (fastdraw, sfc):
+    fastdraw(sfc)
+
+
+def draw_batched (fastdraw, sfc):
+    batch = BlitBatch(sfc)
+    fastdraw(batch)
+    batch.flush()
+
+
+def time_frames (n, frames):
+    """Time drawing frames in various ways, returning seconds per frame for
+each."""
+    ts = []
+    # graphics look up blit_many in their modules when drawing
+    for f, draw in ((blit_loop, draw_direct), (blit_many, draw_direct),
+                    (blit_many, draw_batched)):
+        graphic.blit_many = graphics.blit_many = f
+        try:
+            ts.append(draw_frames(n, frames, draw))
+        finally:
+            graphic.blit_many = graphics.blit_many = blit_many
+    return ts
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    pg.init()
+    for n in (1000, 10000):
+        print('{0} sprites, blitting each once:'.format(n))
+        for name, t in zip(('blit loop', 'blit_many', 'BlitBatch'),
+                           time_calls(n, frames)):
+            print('{0:>18}: {1:8.3f}ms per frame'.format(name, 1000 * t))
+        print('{0} sprites, drawing frames:'.format(n))
+        for name, t in zip(('blit loop', 'blits per graphic', 'BlitBatch'),
+                           time_frames(n, frames)):
+            print('{0:>18}: {1:8.3f}ms per frame'.format(name, 1000 * t))
@@ -0,0 +1,76 @@
+"""Time the per-frame cost of many running countdowns and counters.
+
+Run from the top-level directory:
+
+    python bench/countdowns.py [number of frames]
+
+For 1000, 10000 and 100000 live instances, this times the scheduler's frame
+update with that many running :class:`Countdown` and :class:`Counter` objects,
+and with the same number of counters that add to their count in a timeout
+called every frame, as :class:`Counter` used to.  Countdowns last from 0.1 to 2
+seconds and restart when they end, so many end during the run; counters have a
+limit they don't reach.
+
+"""
+
+import sys
+import os
+import random
+from time import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.engine.sched import Scheduler
+
+
+class FrameCounter (object):
+    """A counter that adds up the frame time every frame.
+
+FrameCounter(scheduler)
+
+"""
+
+    def __init__ (self, scheduler):
+        self._scheduler = scheduler
+        self.t = 0
+        scheduler.add_timeout(self._update, frames=1)
+
+    def _update (self):
+        self.t += self._scheduler.frame
+        return True
+
+
+def mk_countdowns (s, n, rand):
+    for i in xrange(n):
+        s.countdown(rand.uniform(.1, 2), True).reset()
+
+
+def mk_counters (s, n, rand):
+    for i in xrange(n):
+        s.counter(rand.uniform(10, 20)).reset()
+
+
+def mk_frame_counters (s, n, rand):
+    for i in xrange(n):
+        FrameCounter(s)
+
+
+def run (mk, n, frames):
+    """Time scheduler frames with n objects, returning seconds per frame."""
+    s = Scheduler()
+    mk(s, n, random.Random(0))
+    t0 = time()
+    for frame in xrange(frames):
+        s._update()
+    return (time() - t0) / frames
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    impls = [('Countdown', mk_countdowns), ('Counter', mk_counters),
+             ('per-frame counter', mk_frame_counters)]
+    for n in (1000, 10000, 100000):
+        print('{0} running:'.format(n))
+        for name, mk in impls:
+            print('{0:>18}: {1:8.3f}ms per frame'.format(
+                name, 1000 * run(mk, n, frames)))
@@ -0,0 +1,81 @@
+"""Compare the pure-Python and C fastdraw compositors.
+
+Run from the top-level directory:
+
+    python bench/fastdraw.py [number of frames]
+
+Each scene is a number of graphics spread over several layers, some with
+per-pixel alpha, of which a tenth move each frame.  Both implementations draw
+the same scenes, generated from the same random seed, to the same surface.
+
+"""
+
+import sys
+import os
+import random
+from time import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame as pg
+
+from game.engine.gfx import Graphic, _fastdraw
+try:
+    from game.engine.gfx import _gm
+except ImportError:
+    _gm = None
+
+SIZE = (800, 600)
+N_LAYERS = 5
+
+
+def mk_scene (n, seed=0):
+    """Create n graphics, returning ``(layers, graphics)``."""
+    rand = random.Random(seed)
+    graphics = dict((l, []) for l in xrange(N_LAYERS + 1))
+    for i in xrange(n):
+        size = (rand.randint(8, 64), rand.randint(8, 64))
+        flags = pg.SRCALPHA if rand.random() < .5 else 0
+        sfc = pg.Surface(size, flags)
+        sfc.fill((rand.randint(0, 255), rand.randint(0, 255),
+                  rand.randint(0, 255), 128))
+        pos = (rand.randint(0, SIZE[0] - size[0]),
+               rand.randint(0, SIZE[1] - size[1]))
+        graphics[rand.randrange(N_LAYERS)].append(Graphic(sfc, pos))
+    # background
+    graphics[N_LAYERS].append(Graphic(pg.Surface(SIZE)))
+    layers = [l for l in sorted(graphics) if graphics[l]]
+    return (layers, graphics)
+
+
+def run (fastdraw, n, frames):
+    """Time drawing a scene, returning seconds per frame."""
+    layers, graphics = mk_scene(n)
+    gs = [g for l in layers for g in graphics[l]][:-1]
+    rand = random.Random(1)
+    sfc = pg.Surface(SIZE)
+    # draw everything once
+    fastdraw(layers, sfc, graphics, [])
+    t = 0
+    for frame in xrange(frames):
+        for g in rand.sample(gs, max(n // 10, 1)):
+            g.move_by(rand.randint(-5, 5), rand.randint(-5, 5))
+        t0 = time()
+        fastdraw(layers, sfc, graphics, [])
+        t += time() - t0
+    return t / frames
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    pg.init()
+    impls = [('Python', _fastdraw.fastdraw)]
+    if _gm is None:
+        print('_gm extension not built: only timing the pure-Python version')
+    else:
+        impls.append(('C', _gm.fastdraw))
+    for n in (10, 100, 1000):
+        print('{0} graphics:'.format(n))
+        for name, fastdraw in impls:
+            print('{0:>8}: {1:8.3f}ms per frame'.format(
+                name, 1000 * run(fastdraw, n, frames)))
@@ -0,0 +1,80 @@
+"""Compare the memory used by Graphic and Sprite instances.
+
+Run from the top-level directory:
+
+    python bench/sprite_memory.py [number of instances]
+
+Each instance is given the same surface, and is added to a GraphicsManager and
+drawn once so that its drawing state is allocated.  The memory counted for an
+instance is every object reachable from it that isn't shared with the other
+instances, such as the surface, classes, modules and code.
+
+"""
+
+import sys
+import os
+import gc
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame as pg
+
+from game.engine.gfx import GraphicsManager, Graphic, Sprite
+
+# objects shared between instances, which are never counted
+_shared_types = (type, types.ModuleType, types.CodeType,
+                 types.BuiltinFunctionType)
+
+
+def deep_size (roots, shared):
+    """Total size in bytes of objects reachable from roots, excluding shared.
+
+deep_size(roots, shared) -> size
+
+:arg roots: objects to start from.
+:arg shared: set of ``id`` values of objects not to count or look inside.
+
+"""
+    seen = set(shared)
+    todo = list(roots)
+    size = 0
+    while todo:
+        obj = todo.pop()
+        if id(obj) in seen or isinstance(obj, _shared_types):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, types.FunctionType):
+            # a per-instance function owns its closure and defaults only
+            todo.extend(obj.__closure__ or ())
+            todo.extend(obj.__defaults__ or ())
+        else:
+            todo.extend(gc.get_referents(obj))
+    return size
+
+
+def measure (cls, n, sfc):
+    """Per-instance memory in bytes of n instances of a graphic class."""
+    gm = GraphicsManager(None, (640, 480))
+    gs = [cls(sfc, (i % 640, i % 480)) for i in xrange(n)]
+    gm.add(*gs)
+    gm.draw(False)
+    # everything the instances can reach through the manager, the surface or
+    # module globals is shared
+    shared = set(id(o) for o in (gm, gm.__dict__, sfc, gs))
+    shared.update(id(m.__dict__) for m in sys.modules.values()
+                  if m is not None)
+    return deep_size(gs, shared) / float(n)
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    pg.init()
+    sfc = pg.Surface((8, 8))
+    sizes = {}
+    for cls in (Graphic, Sprite):
+        sizes[cls] = measure(cls, n, sfc)
+        print('{:>8}: {:>7.0f} bytes per instance, {:>6.1f} MiB for {}'.format(
+            cls.__name__, sizes[cls], sizes[cls] * n / 2 ** 20, n))
+    print('ratio: {:.1f}x'.format(sizes[Graphic] / sizes[Sprite]))
@@ -1,6 +1,8 @@
+import os
+
 import pygame as pg
 
-from . import game, sched, evt, gfx, text, util, settings
+from . import game, sched, evt, gfx, text, util, settings, instrument
 from .conf import conf
 
 __all__ = ('conf', 'init', 'quit')
@@ -10,6 +12,10 @@ pg.mixer.pre_init(buffer = 1024)
 
 def init ():
     """Initialise the game engine."""
+    if conf.HEADLESS:
+        # don't open a window or need a sound device
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
     pg.init()
     if conf.WINDOW_ICON is not None:
         pg.display.set_icon(pg.image.load(conf.WINDOW_ICON))
@@ -50,6 +50,12 @@ class Conf (object):
     DROP_FRAMES = True
     MIN_FPS = dd(25) # per-world
     FPS_AVERAGE_RATIO = .3
+    FRAME_SPIN_TIME = 0
+    FRAME_STATS_LENGTH = 600
+    VIRTUAL_TIME = False
+    HEADLESS = False
+    PROFILE_CALLBACKS = False
+    PROFILE_DUMP_INTERVAL = None
 
     # paths
     # need to take care to get unicode path
@@ -92,6 +98,15 @@ class Conf (object):
     RES_F = None
     MIN_RES_W = (320, 180)
     ASPECT_RATIO = None
+    DIRTY_RECT_COST = 256
+    MAX_DIRTY_RECTS = 64
+    UPDATE_COST_EXPLORE = 120
+    SPATIAL_INDEX_CELL = 64
+    RENDER_THREADS = 0
+    TRANSFORM_CACHE_SIZE = 16 * 1024 ** 2
+    ROTATE_ATLAS_SIZE = 4 * 1024 ** 2
+    SURFACE_POOL_SIZE = 8 * 1024 ** 2
+    KEEP_TRANSFORMED = 'all'
 
     # input
     GRAB_EVENTS = dd(False)
@@ -10,12 +10,14 @@ import sys
 import os
 from random import choice, randrange
 from math import exp
+from timeit import default_timer as time
 
 import pygame as pg
 from pygame.display import update as update_display
 
 from .conf import conf
 from .sched import Scheduler
+from .instrument import Profiler
 from . import evt, gfx, res, text
 from .util import ir, convert_sfc
 
@@ -35,6 +37,66 @@ argument ``t`` to run for this many seconds.
         Game(*args, **kwargs).run(t)
 
 
+class _UpdateCost (object):
+    """Measures how long display updates take, to choose the cheapest."""
+
+    def __init__ (self):
+        # seconds for a full update
+        self.full = None
+        # estimated seconds per rect and per pixel for partial updates
+        self.rect = 0
+        self.pixel = None
+        # exponentially weighted sums for a least-squares fit of
+        # t = rect * n_rects + pixel * n_pixels: [nn, np, pp, tn, tp]
+        self._sums = [0] * 5
+        # number of choices since we last tried the other kind of update
+        self._since_explore = 0
+
+    def use_partial (self, rects, area):
+        """Decide whether to update the display in the given rects rather than
+everywhere, where the display has ``area`` pixels."""
+        self._since_explore += 1
+        n_pixels = sum(r[2] * r[3] for r in rects)
+        if n_pixels >= area:
+            # covers at least as much as a full update, and in more pieces
+            return False
+        if self.full is None or self.pixel is None:
+            # not measured yet: try whichever we haven't measured
+            return self.pixel is None
+        partial = self.rect * len(rects) + self.pixel * n_pixels < self.full
+        if self._since_explore >= conf.UPDATE_COST_EXPLORE:
+            # estimates for the other kind of update may be out of date
+            self._since_explore = 0
+            partial = not partial
+        return partial
+
+    def record_full (self, t):
+        """Record the time taken by a full update."""
+        r = conf.FPS_AVERAGE_RATIO
+        self.full = t if self.full is None else (1 - r) * self.full + r * t
+
+    def record_partial (self, rects, t):
+        """Record the time taken by a partial update."""
+        n = len(rects)
+        p = sum(r[2] * r[3] for r in rects)
+        keep = 1 - conf.FPS_AVERAGE_RATIO
+        s = self._sums
+        for i, x in enumerate((n * n, n * p, p * p, t * n, t * p)):
+            s[i] = keep * s[i] + x
+        nn, np, pp, tn, tp = s
+        det = nn * pp - np * np
+        rect = pixel = None
+        if det > 1e-9 * nn * pp:
+            rect = (pp * tn - np * tp) / det
+            pixel = (nn * tp - np * tn) / det
+        if rect is None or rect < 0 or pixel < 0:
+            # can't separate the costs: attribute everything to pixels
+            rect = 0
+            pixel = tp / pp if pp else None
+        self.rect = rect
+        self.pixel = pixel
+
+
 class _ClassProperty (property):
     """Decorator to create a static property."""
 
@@ -163,8 +225,13 @@ This receives the extra arguments passed in constructing the world through the
 
     def _update (self):
         """Called by the game to update."""
-        for e in list(self.entities):
-            e.update()
+        prof = self.scheduler.profiler
+        if prof is not None and prof.enabled:
+            for e in list(self.entities):
+                prof.call('entity', type(e).__name__, e.update)
+        else:
+            for e in list(self.entities):
+                e.update()
         self.update()
 
     def _handle_slowdown (self):
@@ -532,13 +599,23 @@ Takes the same arguments as :meth:`create_world` and passes them to it.
 
     def __init__ (self, *args, **kwargs):
         conf.GAME = self
-        conf.RES_F = pg.display.list_modes()[0]
+        modes = pg.display.list_modes()
+        # with some drivers (eg. the dummy driver when headless), any mode is
+        # allowed, or none are listed
+        conf.RES_F = modes[0] if modes and modes != -1 else conf.RES_W
         self._quit = False
         self._update_again = False
         #: The currently running world.
         self.world = None
         #: A list of previous (nested) worlds, most 'recent' last.
         self.worlds = []
+        self._update_cost = _UpdateCost()
+        #: :class:`instrument.Profiler <engine.instrument.Profiler>` instance
+        #: recording time spent in each part of every frame, shared by the
+        #: schedulers of all worlds.  It is enabled according to
+        #: :data:`conf.PROFILE_CALLBACKS`.
+        self.profiler = Profiler(conf.PROFILE_CALLBACKS,
+                                 conf.PROFILE_DUMP_INTERVAL)
 
         # load display settings
         #: The main Pygame surface.
@@ -621,6 +698,7 @@ should be passed to that base class).
         # instantiate class
         world = cls(scheduler, eh, self.resources, *args, **kwargs)
         scheduler.fps = conf.FPS[world.id]
+        scheduler.profiler = self.profiler
         return world
 
     def _select_world (self, world):
@@ -759,26 +837,40 @@ If this quits the last (root) world, exit the game.
 
     def _update (self):
         """Update worlds and draw."""
+        prof = self.profiler
         self._update_again = True
         while self._update_again:
             self._update_again = False
-            self.world.evthandler.update()
+            prof.call('phase', 'events', self.world.evthandler.update)
             # if a new world was created during the above call, we'll end up
             # updating twice before drawing
             if not self._update_again:
-                self.world._update()
-        if self.world._handle_slowdown():
-            drawn = self.world.draw()
-            # update display
-            if drawn is True:
-                update_display()
-            elif drawn:
-                if len(drawn) > 60: # empirical - faster to update everything
-                    update_display()
-                else:
-                    update_display(drawn)
+                prof.call('phase', 'update', self.world._update)
+        if not conf.HEADLESS and self.world._handle_slowdown():
+            prof.call('phase', 'draw', self._draw)
+        prof.tick()
         return True
 
+    def _draw (self):
+        """Draw the current world and update the display."""
+        drawn = self.world.draw()
+        if not drawn:
+            return
+        # update display, choosing between updating changed areas and
+        # updating everything by how long each has taken before
+        cost = self._update_cost
+        if drawn is not True:
+            if not cost.use_partial(drawn, self.screen.get_width() *
+                                           self.screen.get_height()):
+                drawn = True
+        start = time()
+        if drawn is True:
+            update_display()
+            cost.record_full(time() - start)
+        else:
+            update_display(drawn)
+            cost.record_partial(drawn, time() - start)
+
     # running
 
     def run (self, t = None):
@@ -794,6 +886,8 @@ run([t])
         self._init_cbs()
         while not self._quit and (t is None or t > 0):
             t = self.world.scheduler.run(seconds = t)
+        if self.profiler.enabled:
+            self.profiler.dump()
         self.resources.drop(conf.DEFAULT_RESOURCE_POOL, self)
         self._using_pool = None
         conf.rm_cbs(self)
@@ -0,0 +1,144 @@
+"""Pure-Python implementation of the compositor in the ``_gm`` extension.
+
+Used by :class:`GraphicsManager <engine.gfx.container.GraphicsManager>` when
+the extension hasn't been built; behaves exactly the same, just slower.
+
+"""
+
+from pygame import Rect
+
+
+def mk_disjoint (add, rm):
+    """Get disjoint rects covering some rects, excluding others.
+
+mk_disjoint(add, rm) -> rects
+
+:arg add: list of ``pygame.Rect`` instances to cover.
+:arg rm: list of ``pygame.Rect`` instances to exclude from the result.
+
+:return: a list of non-overlapping ``pygame.Rect`` instances covering every
+         point in ``add`` and no point in ``rm``.
+
+"""
+    # split the plane into a grid using every edge of every rect
+    xs = set()
+    ys = set()
+    for rects in (add, rm):
+        for x, y, w, h in rects:
+            xs.add(x)
+            xs.add(x + w)
+            ys.add(y)
+            ys.add(y + h)
+    xs = sorted(xs)
+    ys = sorted(ys)
+    if len(xs) < 2 or len(ys) < 2:
+        return []
+    x_index = dict((x, i) for i, x in enumerate(xs))
+    y_index = dict((y, i) for i, y in enumerate(ys))
+    # mark cells: 2 if in add, 1 if in rm
+    grid = [bytearray(len(xs) - 1) for i in xrange(len(ys) - 1)]
+    for bit, rects in ((2, add), (1, rm)):
+        for x, y, w, h in rects:
+            if w > 0 and h > 0:
+                col0 = x_index[x]
+                col1 = x_index[x + w]
+                for row in grid[y_index[y]:y_index[y + h]]:
+                    for col in xrange(col0, col1):
+                        row[col] |= bit
+    # generate a rect for each run of add-and-not-rm cells in each row
+    rs = []
+    for i, row in enumerate(grid):
+        y = ys[i]
+        h = ys[i + 1] - y
+        left = None
+        for j, cell in enumerate(row):
+            if cell == 2:
+                if left is None:
+                    left = xs[j]
+            elif left is not None:
+                rs.append(Rect(left, y, xs[j] - left, h))
+                left = None
+        if left is not None:
+            rs.append(Rect(left, y, xs[-1] - left, h))
+    return rs
+
+
+def fastdraw (layers, sfc, graphics, dirty):
+    """Draw everything.
+
+fastdraw(layers, sfc, graphics, dirty) -> drawn
+
+:arg layers: sorted list of layers to draw, frontmost first.
+:arg sfc: ``pygame.Surface`` to draw to.
+:arg graphics: ``{layer: graphics}``, where ``graphics`` is a set of
+               :class:`Graphic <engine.gfx.graphic.Graphic>` instances.
+:arg dirty: list of ``pygame.Rect`` instances that need to be redrawn
+            regardless of changes to graphics; this is extended with the
+            graphics' changed areas.
+
+:return: a list of disjoint rects covering the changed parts of ``sfc``, or
+         ``False`` if nothing changed.
+
+"""
+    graphics = [list(graphics[l]) for l in layers]
+    # get dirty rects from graphics
+    for gs in graphics:
+        for g in gs:
+            g._pre_draw()
+            g_dirty = g._dirty
+            was_visible = g.was_visible
+            visible = g.visible
+            if was_visible != visible:
+                # visibility changed since last draw: set dirty everywhere
+                g_dirty = [g._postrot_rect if visible
+                           else g._last_postrot_rect]
+            for vis, g_rect in ((was_visible, g._last_postrot_rect),
+                                (visible, g._postrot_rect)):
+                if vis:
+                    for r in g_dirty:
+                        dirty.append(r.clip(g_rect))
+            g.was_visible = visible
+
+    # only have something to do if dirty is non-empty
+    if not dirty:
+        return False
+
+    dirty_opaque = []
+    dirty_by_layer = []
+    for gs in graphics:
+        # get opaque regions of dirty rects
+        l_dirty_opaque = []
+        for r in dirty:
+            good = True
+            for g in gs:
+                r = r.clip(g._postrot_rect)
+                opaque = g._opaque_in(r)
+                good = r.w > 0 and r.h > 0 and opaque == True
+                if not good:
+                    break
+            if good:
+                l_dirty_opaque.append(r)
+        # undirty below opaque graphics and make dirty rects disjoint
+        dirty_by_layer.append(mk_disjoint(dirty, dirty_opaque))
+        dirty_opaque += l_dirty_opaque
+
+    # redraw in dirty rects, backmost layer first
+    for i in xrange(len(graphics) - 1, -1, -1):
+        rs = dirty_by_layer[i]
+        for g in graphics[i]:
+            if g.visible:
+                g_rect = g._postrot_rect
+                draw_in = []
+                for r in rs:
+                    r = g_rect.clip(r)
+                    if r.w > 0 and r.h > 0:
+                        draw_in.append(r)
+                if draw_in:
+                    g._draw(sfc, draw_in)
+            g._dirty = []
+
+    # make all rects disjoint for faster display updating
+    drawn = []
+    for rs in dirty_by_layer:
+        drawn += rs
+    return mk_disjoint(drawn, [])
@@ -7,10 +7,6 @@ TODO:
  - GraphicsGroup:
     - allow for transforms
     - internal layers (has allowed range in manager, and distributes graphics within it)
- - ignore off-screen (OoB) things (clip all dirty rects and discard zero-size ones)
-    - do it before _pre_draw
- - GraphicsManager.offset to offset the viewing window (Surface.scroll is fast?)
-    - supports parallax: set to {layer: ratio} or (function(layer) -> ratio) or set a Graphic property (make GraphicView have its own copy)
  - do something with/like dispman
 
 ---NODOC---
@@ -18,17 +14,22 @@ TODO:
 """
 
 import sys
+from multiprocessing.pool import ThreadPool
 
 import pygame as pg
 
+from ..conf import conf
 from .. import sched
-from ..util import ir, normalise_colour, blank_sfc, combine_drawn
+from ..util import (ir, normalise_colour, blank_sfc, combine_drawn,
+                    coalesce_rects)
 try:
     from _gm import fastdraw
 except ImportError:
-    print >> sys.stderr, 'error: couldn\'t import _gm; did you remember to `make\'?'
-    sys.exit(1)
+    print >> sys.stderr, 'warning: couldn\'t import _gm (did you remember to ' \
+                         '`make\'?); using slower pure-Python drawing'
+    from ._fastdraw import fastdraw
 from .graphic import Graphic
+from .util import BlitBatch
 from .graphics import Colour
 
 
@@ -54,7 +55,8 @@ These can be set to apply to all contained graphics.
     #: Attributes which are mapped to
     #: :class:`Graphic <engine.gfx.graphic.Graphic>` attributes.
     graphic_attrs = ('layer', 'visible', 'blit_flags', 'anchor', 'rot_anchor',
-                     'scale_fn', 'rotate_fn', 'rotate_threshold')
+                     'scale_fn', 'mipmap', 'scale_step', 'rotate_fn',
+                     'rotate_threshold', 'rotate_steps', 'keep_transformed')
 
     def __init__ (self, x=0, y=0):
         self._pos = [x, y]
@@ -252,6 +254,122 @@ to put graphics in."""
         self._manager = manager
 
 
+# (n_threads, pool)
+_render_pool = None
+
+
+def _render (graphic):
+    graphic.render()
+
+
+def _render_all (graphics):
+    """Apply queued transformations for graphics that need it.
+
+_render_all(graphics)
+
+:arg graphics: ``{layer: graphics}`` to be drawn.
+
+Uses a thread pool if :data:`conf.RENDER_THREADS <conf.RENDER_THREADS>` is
+greater than ``1``.  Only graphics whose transformations don't share state with
+others or call back into other code are rendered in threads; the rest are
+rendered as normal when drawn.
+
+"""
+    global _render_pool
+    n_threads = conf.RENDER_THREADS
+    if n_threads <= 1:
+        return
+    render = Graphic.render.__func__
+    todo = []
+    for gs in graphics.itervalues():
+        for g in gs:
+            if (getattr(getattr(type(g), 'render', None), '__func__',
+                        None) is render and
+                g.visible and not g.is_view and not g._evts and
+                (g._queued_transforms or g._orig_dirty or
+                 g.transforms != g._last_transforms)):
+                todo.append(g)
+    if len(todo) > 1:
+        if _render_pool is None or _render_pool[0] != n_threads:
+            if _render_pool is not None:
+                _render_pool[1].close()
+            _render_pool = (n_threads, ThreadPool(n_threads))
+        # each graphic only touches its own state, so order doesn't matter
+        _render_pool[1].map(_render, todo)
+
+
+class _RectGrid (object):
+    """Uniform grid hash of rects, for finding items by position.
+
+_RectGrid(cell_size)
+
+"""
+
+    def __init__ (self, cell_size):
+        self.cell_size = cell_size
+        # {(i, j): items}
+        self._cells = {}
+        # {item: (rect, cells)}
+        self._items = {}
+
+    def _cells_in (self, rect):
+        c = self.cell_size
+        x, y, w, h = rect
+        return [(i, j) for i in xrange(x // c, (x + w - 1) // c + 1)
+                       for j in xrange(y // c, (y + h - 1) // c + 1)]
+
+    def set (self, item, rect):
+        """Add an item or update its rect."""
+        old = self._items.get(item)
+        if old is not None and old[0] == rect:
+            return
+        if rect[2] <= 0 or rect[3] <= 0:
+            self.rm(item)
+            return
+        rect = pg.Rect(rect)
+        new_cells = self._cells_in(rect)
+        cells = self._cells
+        if old is not None:
+            old_cells = old[1]
+            for k in set(old_cells).difference(new_cells):
+                items = cells[k]
+                items.remove(item)
+                if not items:
+                    del cells[k]
+        else:
+            old_cells = ()
+        for k in set(new_cells).difference(old_cells):
+            if k in cells:
+                cells[k].add(item)
+            else:
+                cells[k] = set((item,))
+        self._items[item] = (rect, new_cells)
+
+    def rm (self, item):
+        """Remove an item, if present."""
+        old = self._items.pop(item, None)
+        if old is not None:
+            cells = self._cells
+            for k in old[1]:
+                items = cells[k]
+                items.remove(item)
+                if not items:
+                    del cells[k]
+
+    def query (self, rect):
+        """Get the set of items whose rects intersect the given rect."""
+        rect = pg.Rect(rect)
+        if rect.w <= 0 or rect.h <= 0:
+            return set()
+        cells = self._cells
+        items = self._items
+        found = set()
+        for k in self._cells_in(rect):
+            if k in cells:
+                found.update(cells[k])
+        return set(item for item in found if rect.colliderect(items[item][0]))
+
+
 class GraphicsManager (Graphic):
     """Draws things to a surface intelligently.
 
@@ -290,6 +408,22 @@ however, and transformations are only applied in
         self.graphics = {}
         #: A list of layers that contain graphics, lowest first.
         self.layers = []
+        # graphics' rects as of when they were last drawn; graphics update
+        # this themselves (see Graphic._update_index)
+        self._index = _RectGrid(conf.SPATIAL_INDEX_CELL)
+        self._offset = (0, 0)
+        self._parallax = {}
+        self._view_changed = False
+        # view offset of layers with parallax ratio 1 as of the last draw
+        self._scroll_pos = (0, 0)
+        #: A set of layers whose graphics rarely change.  The backmost layers
+        #: that are in this set are drawn to a cached surface, which is then
+        #: drawn in one go, and only redrawn where those graphics change.
+        #: Graphics in these layers should be drawn with the default
+        #: :attr:`blit_flags <engine.gfx.graphic.Graphic.blit_flags>`.
+        self.static_layers = set()
+        # (layers, graphic) for static layers, or None
+        self._static_cache = None
 
     @property
     def orig_sfc (self):
@@ -321,6 +455,113 @@ all graphics to be drawn/updated first.
         """The size of the surface before any transforms."""
         return self._orig_sfc.get_size()
 
+    @property
+    def offset (self):
+        """``(x, y)`` camera position: the point shown at the top-left of
+:attr:`orig_sfc`.
+
+Graphics are drawn at their positions minus this, scaled by their layer's
+:attr:`parallax` ratio, without the graphics themselves being moved.  When this
+changes, what's already drawn is moved using ``pygame.Surface.scroll``, and
+only the newly exposed areas and the graphics that don't move with the camera
+are redrawn.
+
+"""
+        return self._offset
+
+    @offset.setter
+    def offset (self, offset):
+        offset = tuple(offset)
+        if offset != self._offset:
+            self._offset = offset
+            self._view_changed = True
+
+    @property
+    def parallax (self):
+        """Parallax ratios for layers.
+
+This is a ``{layer: ratio}`` dict or a ``function(layer) -> ratio``, where
+``ratio`` is a number or an ``(x, y)`` pair of numbers that :attr:`offset` is
+multiplied by for graphics in that layer.  Layers missing from a dict have
+ratio ``1``; ``0`` fixes graphics to the surface, and values between ``0`` and
+``1`` make for distant backgrounds.  The fade overlay is never offset.
+
+Changing the dict in-place has no effect---set this attribute again instead.
+
+"""
+        return self._parallax
+
+    @parallax.setter
+    def parallax (self, parallax):
+        self._parallax = parallax
+        self._view_changed = True
+
+    def _layer_offset (self, layer):
+        """Get the view offset for graphics in a layer."""
+        if layer is None:
+            # the overlay
+            return (0, 0)
+        p = self._parallax
+        ratio = p(layer) if callable(p) else p.get(layer, 1)
+        if isinstance(ratio, (int, float)):
+            rx = ry = ratio
+        else:
+            rx, ry = ratio
+        x, y = self._offset
+        return (-ir(x * rx), -ir(y * ry))
+
+    def _update_view (self, view):
+        """Apply changes to :attr:`offset` and :attr:`parallax`.
+
+_update_view(view) -> scrolled
+
+:arg view: the surface's rect.
+
+:return: whether the surface was scrolled.
+
+"""
+        self._view_changed = False
+        layer_offset = self._layer_offset
+        for l, gs in self.graphics.iteritems():
+            o = layer_offset(l)
+            for g in gs:
+                g._set_view_offset(o)
+        x, y = self._offset
+        new_pos = (-ir(x), -ir(y))
+        old_pos = self._scroll_pos
+        self._scroll_pos = new_pos
+        sx = new_pos[0] - old_pos[0]
+        sy = new_pos[1] - old_pos[1]
+        dirty = self._gm_dirty
+        w, h = view.size
+        if (not sx and not sy) or dirty is True or abs(sx) >= w or \
+           abs(sy) >= h:
+            # nothing to reuse
+            return False
+        self._orig_sfc.scroll(sx, sy)
+        if self._static_cache is not None:
+            self._static_cache[1].orig_sfc.scroll(sx, sy)
+        # drawn graphics moved with the pixels
+        for gs in self.graphics.itervalues():
+            for g in gs:
+                if g.was_visible:
+                    g._last_postrot_rect = g._last_postrot_rect.move(sx, sy)
+                    lx, ly = g._last_view_offset
+                    g._last_view_offset = (lx + sx, ly + sy)
+        # so did areas waiting to be redrawn
+        dirty = [r.move(sx, sy) for r in dirty] if dirty else []
+        # redraw areas scrolled in from outside
+        if sx > 0:
+            dirty.append(pg.Rect(0, 0, sx, h))
+        elif sx < 0:
+            dirty.append(pg.Rect(w + sx, 0, -sx, h))
+        if sy > 0:
+            dirty.append(pg.Rect(0, 0, w, sy))
+        elif sy < 0:
+            dirty.append(pg.Rect(0, h + sy, w, -sy))
+        self._gm_dirty = dirty
+        return True
+
     @property
     def overlay (self):
         """A :class:`Graphic <engine.gfx.graphic.Graphic>` which is always
@@ -373,8 +614,11 @@ and returns a list of added graphics.
                 all_gs[l] = set((g,))
                 ls.add(l)
             g.own(self, lambda g, gm: self.rm(g))
+            g._set_view_offset(self._layer_offset(l))
             # don't draw over any possible previous location
             g.was_visible = False
+            g._owner_index = self._index
+            self._index.set(g, g._postrot_rect)
         self._set_layers_from_set(ls)
         return graphics
 
@@ -395,6 +639,9 @@ Missing graphics are ignored.
                     # remove from graphics
                     all_gs.remove(g)
                     g.release(self)
+                    self._index.rm(g)
+                    g._owner_index = None
+                    g._set_view_offset((0, 0))
                     # draw over previous location
                     if g.was_visible:
                         self.dirty(g._last_postrot_rect)
@@ -515,27 +762,179 @@ persists; set :attr:`overlay` to ``None`` to remove it.
 Returns ``True`` if the entire surface changed, or a list of rects that cover
 changed parts of the surface, or ``False`` if nothing changed.
 
+Graphics entirely outside the surface are skipped without being rendered.  If
+the surface was scrolled (see :attr:`offset`), the return value is ``True``.
+
 """
         layers = self.layers
         sfc = self._orig_sfc
         if not layers or sfc is None:
             return False
-        graphics = self.graphics
+        view = sfc.get_rect()
+        scrolled = self._view_changed and self._update_view(view)
         dirty = self._gm_dirty
         self._gm_dirty = []
         if dirty is True:
-            dirty = [sfc.get_rect()]
+            dirty = [view]
         elif dirty is False:
             dirty = []
-        dirty = fastdraw(layers, sfc, graphics, dirty)
+        else:
+            dirty = [r.clip(view) for r in dirty]
+        layers = self._draw_static(layers, view, dirty)
+        layers, graphics = self._cull(layers, view, dirty)
+        _render_all(graphics)
+        if self._static_cache is not None:
+            # draw static layers as one graphic, behind everything else
+            static_layers, static_g = self._static_cache
+            layers.append(static_layers[0])
+            graphics[static_layers[0]] = [static_g]
+        dirty = [r for r in dirty if r.w > 0 and r.h > 0]
+        if dirty:
+            dirty = coalesce_rects(dirty, conf.DIRTY_RECT_COST,
+                                   conf.MAX_DIRTY_RECTS)
+        if layers:
+            # graphics' blits are all drawn together
+            batch = BlitBatch(sfc)
+            dirty = fastdraw(layers, batch, graphics, dirty)
+            batch.flush()
+            if self._static_cache is not None:
+                del graphics[self._static_cache[0][0]]
+        # else nothing is in view, so there's nothing to draw in dirty areas
+        if not dirty:
+            dirty = False
+        if scrolled:
+            dirty = True
         if dirty and handle_dirty:
-            Graphic.dirty(self, *dirty)
+            if dirty is True:
+                Graphic.dirty(self)
+            else:
+                Graphic.dirty(self, *dirty)
         if self._orig_dirty:
             dirty = combine_drawn(dirty, self._orig_dirty)
             if not handle_dirty:
                 self._orig_dirty = False
         return dirty
 
+    def _draw_static (self, layers, view, dirty):
+        """Draw the backmost layers in :attr:`static_layers` to their cache.
+
+_draw_static(layers, view, dirty) -> layers
+
+:arg layers: :attr:`layers`.
+:arg view: the surface's rect.
+:arg dirty: list of rects to redraw; areas of the cache that changed are added
+            to this.
+
+:return: the layers in ``layers`` not drawn to the cache.
+
+"""
+        static = self.static_layers
+        i = len(layers)
+        while i > 0 and layers[i - 1] in static:
+            i -= 1
+        static_layers = layers[i:]
+        cache = self._static_cache
+        if cache is not None and (cache[0] != static_layers or
+                                  cache[1].orig_sfc.get_size() != view.size):
+            # graphics have moved between the cache and the surface
+            self._static_cache = cache = None
+            dirty.append(view)
+        if not static_layers:
+            return layers
+        if cache is None:
+            cache_g = Graphic(blank_sfc(view.size), (0, 0), static_layers[0])
+            self._static_cache = (static_layers, cache_g)
+            cache_dirty = [view]
+        else:
+            cache_g = cache[1]
+            cache_dirty = list(dirty)
+        static_layers, graphics = self._cull(static_layers, view, cache_dirty)
+        _render_all(graphics)
+        cache_dirty = [r for r in cache_dirty if r.w > 0 and r.h > 0]
+        if static_layers:
+            if cache_dirty:
+                cache_dirty = coalesce_rects(cache_dirty, conf.DIRTY_RECT_COST,
+                                             conf.MAX_DIRTY_RECTS)
+            batch = BlitBatch(cache_g.orig_sfc)
+            cache_dirty = fastdraw(static_layers, batch, graphics, cache_dirty)
+            batch.flush()
+        if cache_dirty:
+            dirty.extend(cache_dirty)
+        return layers[:i]
+
+    def _cull (self, layers, view, dirty):
+        """Remove graphics outside the surface before drawing.
+
+_cull(layers, view, dirty) -> (layers, graphics)
+
+:arg layers: :attr:`layers`.
+:arg view: the surface's rect.
+:arg dirty: list of rects to redraw; areas left by culled graphics that were
+            drawn last time are added to this.
+
+:return: :attr:`layers` and :attr:`graphics` with culled graphics and layers
+         left empty removed.
+
+Culled graphics don't get rendered, so any queued transformations are deferred
+until they're back in view.
+
+"""
+        all_graphics = self.graphics
+        graphics = {}
+        in_view = []
+        for l in layers:
+            gs = []
+            for g in all_graphics[l]:
+                r = g._cull_rect()
+                if r is None or view.colliderect(r):
+                    gs.append(g)
+                else:
+                    if g.was_visible:
+                        # undraw from where it was last time
+                        dirty.append(g._last_postrot_rect.clip(view))
+                        g.was_visible = False
+                    # redrawn in full once it's back in view
+                    g._dirty = []
+            if gs:
+                graphics[l] = gs
+                in_view.append(l)
+        return (in_view, graphics)
+
+    def graphics_in (self, rect):
+        """Get the graphics that cover any part of a rect.
+
+graphics_in(rect) -> graphics
+
+:arg rect: ``pygame.Rect``-like area of :attr:`orig_sfc` to look in.
+
+:return: a list of :class:`Graphic <engine.gfx.graphic.Graphic>` instances,
+         frontmost (lowest layer) first.
+
+This considers graphics' :attr:`postrot_rect
+<engine.gfx.graphic.Graphic.postrot_rect>` as of the last call to :meth:`draw`,
+so it returns what is currently on the surface, ignoring any transparency.
+Graphics that aren't visible or were outside the surface are excluded.
+
+Graphics keep an index of their positions up to date as they are drawn, so a
+query only looks at graphics near ``rect``.
+
+"""
+        order = dict((l, i) for i, l in enumerate(self.layers))
+        return sorted((g for g in self._index.query(rect) if g.was_visible),
+                      key=lambda g: order[g.layer])
+
+    def graphics_at (self, pos):
+        """Get the graphics that cover a point.
+
+graphics_at(pos) -> graphics
+
+:arg pos: ``(x, y)`` position in :attr:`orig_sfc`.
+
+:return: a list of graphics as returned by :meth:`graphics_in`.
+
+"""
+        return self.graphics_in((pos, (1, 1)))
+
     def render (self):
         """:inherit:"""
         self.draw()
@@ -14,14 +14,35 @@ TODO:
 
 """
 
-from math import sin, cos, pi
+from math import sin, cos, pi, ceil, hypot
+from weakref import ref
 
 import pygame as pg
 from pygame import Rect
 
 from ..conf import conf
 from ..util import (ir, pos_in_rect, align_rect, normalise_colour, has_alpha,
-                    blank_sfc, combine_drawn, Owned)
+                    combine_drawn, Owned, OwnError)
+from ..res import _measure_img
+from .util import blit_many, transform_cache, surface_pool
+
+
+def _rotozoom (sfc, angle):
+    # default Graphic.rotate_fn; a single function so that results can be
+    # shared through transform_cache
+    return pg.transform.rotozoom(sfc, angle * 180 / pi, 1)
+
+
+class _Dropped (object):
+    # stands in for a transformed surface that wasn't kept (see
+    # Graphic.keep_transformed), remembering its size
+    __slots__ = ('size',)
+
+    def __init__ (self, size):
+        self.size = size
+
+    def get_size (self):
+        return self.size
 
 
 class Graphic (Owned):
@@ -62,6 +83,9 @@ correspond to builtin transforms (see :meth:`transform`).
 
     is_view = False
     _builtin_transforms = ('crop', 'flip', 'tint', 'resize', 'rotate')
+    # transforms to keep the source surface for with keep_transformed set to
+    # 'checkpoints'
+    _expensive_transforms = ('resize', 'rotate')
 
     def __init__ (self, img, pos=(0, 0), layer=0,
                   pool=conf.DEFAULT_RESOURCE_POOL, res_mgr=None):
@@ -83,7 +107,12 @@ correspond to builtin transforms (see :meth:`transform`).
         self.last_rect = Rect(self._rect)
         self._anchor = (0, 0)
         self._rot_anchor = 'center'
-        self._rot_offset = (0, 0) # postrot_pos = pos + rot_offset
+        self._rot_offset = (0, 0) # postrot_pos = pos + rot_offset + view_offset
+        # set by the manager when scrolled
+        self._view_offset = self._last_view_offset = (0, 0)
+        # spatial index of the manager the graphic is in, kept up to date with
+        # _postrot_rect when drawn
+        self._owner_index = None
         self._must_apply_rot = False
         #: A list of transformations applied to the graphic.  Always contains
         #: the builtin transforms as strings (though they do nothing
@@ -115,9 +144,16 @@ correspond to builtin transforms (see :meth:`transform`).
         self._tint_colour = (255, 255, 255, 255)
         self._angle = 0
         self._scale_fn = pg.transform.smoothscale
-        self._rotate_fn = lambda sfc, angle: \
-            pg.transform.rotozoom(sfc, angle * 180 / pi, 1)
+        self._mipmap = False
+        # [weakref to src, scale_fn, halvings]
+        self._mips = None
+        self._scale_step = 0
+        self._rotate_fn = _rotozoom
         self._rotate_threshold = 2 * pi / 500
+        self._rotate_steps = 0
+        self._keep_transformed = None
+        # [weakref to src, rotate_fn, steps, {step: sfc}, size]
+        self._rot_atlas = None
         self._orig_dirty = False # where original surface is changed
         # where final surface is changed; gets used (and reset) by manager
         self._dirty = []
@@ -159,6 +195,9 @@ When setting this, the surface should be already converted for blitting.
         size = sfc.get_size()
         old_sfc = self._orig_sfc
         self._orig_sfc = sfc
+        if sfc is old_sfc:
+            # altered in place
+            transform_cache.touch(sfc)
         if size != old_sfc.get_size():
             self.size_changed(size)
         self._orig_dirty = True
@@ -168,7 +207,8 @@ When setting this, the surface should be already converted for blitting.
     def surface (self):
         """The (possibly transformed) surface that will be used for drawing.
 
-Accessing this will cause all queued transformations to be applied.
+Accessing this will cause all queued transformations to be applied.  The graphic
+may alter this surface when its transformations change; copy it to keep it.
 
 """
         self.render()
@@ -373,7 +413,12 @@ Also see :attr:`rot_anchor`.
 
     @property
     def postrot_rect (self):
-        """``pygame.Rect`` giving the on-screen area covered after rotation."""
+        """``pygame.Rect`` giving the on-screen area covered after rotation.
+
+This includes any scrolling done by the manager the graphic is in (see
+:attr:`GraphicsManager.offset <engine.gfx.container.GraphicsManager.offset>`).
+
+"""
         self.render()
         return self._postrot_rect
 
@@ -421,6 +466,47 @@ signature as this default).
         self._scale_fn = scale_fn
         self.retransform('resize')
 
+    @property
+    def mipmap (self):
+        """Whether to keep halved copies of the surface to resize from.
+
+Defaults to ``False``.  If ``True``, :meth:`resize` shrinks the smallest of the
+successively halved surfaces that is still at least as large as the target
+size, instead of the full-size surface.  The halvings are made (using
+:attr:`scale_fn`) as they're needed, and kept until the surface changes; they
+take up to a third as much memory again as the surface.
+
+"""
+        return self._mipmap
+
+    @mipmap.setter
+    def mipmap (self, mipmap):
+        self._mipmap = mipmap
+        if not mipmap:
+            self._mips = None
+        self.retransform('resize')
+
+    @property
+    def scale_step (self):
+        """Quantise scaling ratios to multiples of this number.
+
+Defaults to ``0``, which means sizes passed to :meth:`resize` are used
+exactly.  Otherwise, the ratio of the new size to the old size in each
+direction is rounded to a multiple of this (a ratio of exactly ``1`` is left
+alone, even if not a multiple), so that when the size is changing
+continuously (such as through
+:meth:`Scheduler.interp <engine.sched.Scheduler.interp>`), the same sizes recur
+and their results can be reused (see
+:data:`transform_cache <engine.gfx.util.transform_cache>`).
+
+"""
+        return self._scale_step
+
+    @scale_step.setter
+    def scale_step (self, scale_step):
+        self._scale_step = scale_step
+        self.retransform('resize')
+
     @property
     def rotate_fn (self):
         """Function to use for rotating.
@@ -448,6 +534,51 @@ Defaults to ``2 * pi / 500``."""
         self._rotate_threshold = rotate_threshold
         self.retransform('rotate')
 
+    @property
+    def rotate_steps (self):
+        """Number of evenly spaced angles to snap rotation to.
+
+Defaults to ``0``, which means the exact angle passed to :meth:`rotate` is
+used.  Otherwise, the nearest of this many angles is used (:attr:`angle` still
+gives the requested angle), and the rotated surfaces are kept, so that a
+spinning graphic only rotates its surface once for each angle.  At most
+:data:`conf.ROTATE_ATLAS_SIZE <engine.conf.ROTATE_ATLAS_SIZE>` bytes of
+surfaces are kept for each graphic.
+
+"""
+        return self._rotate_steps
+
+    @rotate_steps.setter
+    def rotate_steps (self, rotate_steps):
+        self._rotate_steps = rotate_steps
+        self.retransform('rotate')
+
+    @property
+    def keep_transformed (self):
+        """Which transformed surfaces to keep between renders.
+
+This is one of:
+
+- ``'all'``: keep the result of every transformation, so that changing a
+  transformation only reapplies that one and those after it;
+- ``'checkpoints'``: keep the final result and the surfaces that the expensive
+  transformations (:meth:`resize` and :meth:`rotate`) start from, and reapply
+  transformations from the nearest kept surface;
+- ``'final'``: keep only the final result, and reapply transformations from
+  :attr:`orig_sfc`.
+
+Defaults to ``None``, which means to use
+:data:`conf.KEEP_TRANSFORMED <engine.conf.KEEP_TRANSFORMED>`.  Use
+:meth:`transform_memory` to see how much memory is used.
+
+"""
+        return self._keep_transformed
+
+    @keep_transformed.setter
+    def keep_transformed (self, keep_transformed):
+        self._keep_transformed = keep_transformed
+        self._drop_transformed()
+
     # other properties
 
     @property
@@ -616,6 +747,13 @@ queued transformations to be applied.
         # now queue is empty, so is_size will be False
         sfc, is_size = self._sfc_before_transform(transform_fn)
         assert not is_size
+        if isinstance(sfc, _Dropped):
+            # wasn't kept: transform again
+            ts = self._transforms
+            for fn in self.transforms:
+                if fn in ts and ts[fn][1] is sfc:
+                    sfc = self._replay(fn)
+                    break
         return sfc
 
     def sz_before_transform (self, transform_fn):
@@ -968,6 +1106,9 @@ If successful, all transformations are reapplied afterwards, if any.
             elif h is False:
                 h = ir(oh * float(w) / ow)
             scale = (float(w) / ow, float(h) / oh)
+        if self._scale_step:
+            w, h = self._quantise_size(w, h, ow, oh)
+            scale = (float(w) / ow, float(h) / oh)
         ox = ir((1 - scale[0]) * ax)
         oy = ir((1 - scale[1]) * ay)
 
@@ -983,6 +1124,51 @@ If successful, all transformations are reapplied afterwards, if any.
 
         return ((apply_fn, undo_fn), (w, h))
 
+    def _transform_dest (self, fn, src, dest, size, alpha):
+        # get a surface to write the full result of builtin transform fn into:
+        # the last result if it's ours and fits, else one from the pool
+        owner = (id(self), fn)
+        if (dest is not None and dest is not src and
+            dest.get_size() == size and
+            bool(dest.get_flags() & pg.SRCALPHA) == alpha and
+            surface_pool.owner(dest) == owner and
+            not transform_cache.shared(dest)):
+            return dest
+        return surface_pool.get(size, alpha, owner)
+
+    def _quantise_size (self, w, h, start_w, start_h):
+        # round a target size according to scale_step; the original size is
+        # always allowed, so an unscaled graphic isn't resized
+        step = self._scale_step
+        if step:
+            if start_w and w != start_w:
+                w = ir(max(ir(float(w) / start_w / step), 1) * step * start_w)
+            if start_h and h != start_h:
+                h = ir(max(ir(float(h) / start_h / step), 1) * step * start_h)
+        return (w, h)
+
+    def _mip_level (self, src, dirty, w, h):
+        # get the smallest halving of src at least as large as (w, h)
+        scale_fn = self.scale_fn
+        mips = self._mips
+        if (dirty or mips is None or mips[0]() is not src or
+            mips[1] is not scale_fn):
+            # source changed: start again; don't keep the source alive, in case
+            # keep_transformed drops it
+            mips = self._mips = [ref(src), scale_fn, []]
+        levels = mips[2]
+        level = src
+        lw, lh = src.get_size()
+        i = 0
+        while lw // 2 >= max(w, 1) and lh // 2 >= max(h, 1):
+            lw //= 2
+            lh //= 2
+            if i == len(levels):
+                levels.append(scale_fn(level, (lw, lh)))
+            level = levels[i]
+            i += 1
+        return level
+
     def _resize (self, src, dest, dirty, last_args, w, h, scale=False):
         start_w, start_h = src.get_size()
 
@@ -999,10 +1185,13 @@ If successful, all transformations are reapplied afterwards, if any.
                     h = start_h
                 elif h is False:
                     h = ir(start_h * float(w) / start_w)
-            return (w, h)
+            return self._quantise_size(w, h, start_w, start_h)
 
         w, h = parse_args(w, h, scale)
         new_dirty = True
+        # share the result unless the size is changing continuously
+        share = (last_args is None or self._scale_step or
+                 (w, h) == parse_args(*last_args))
         if dirty is not True and last_args is not None:
             if (w, h) == parse_args(*last_args):
                 # same as last time
@@ -1023,7 +1212,28 @@ If successful, all transformations are reapplied afterwards, if any.
             return (src, new_dirty if last_args is None else True)
 
         # full transform
-        return (self.scale_fn(src, (w, h)), new_dirty)
+        scale_fn = self.scale_fn
+        key = ('resize', w, h, scale_fn, self._mipmap)
+        new_sfc = transform_cache.get(src, *key)
+        if new_sfc is None:
+            base = self._mip_level(src, dirty, w, h) if self._mipmap else src
+            owner = (id(self), 'resize')
+            if (scale_fn in (pg.transform.smoothscale, pg.transform.scale) and
+                dest is not None and dest is not src and
+                dest.get_size() == (w, h) and
+                dest.get_bitsize() == base.get_bitsize() and
+                dest.get_masks() == base.get_masks() and
+                surface_pool.owner(dest) == owner and
+                not transform_cache.shared(dest)):
+                # write into the last result
+                new_sfc = scale_fn(base, (w, h), dest)
+            else:
+                new_sfc = scale_fn(base, (w, h))
+                if share:
+                    transform_cache.put(src, new_sfc, *key)
+                if not transform_cache.shared(new_sfc):
+                    surface_pool.claim(new_sfc, owner)
+        return (new_sfc, new_dirty)
 
     def resize (self, w=None, h=None, scale=False):
         """Resize the graphic.
@@ -1096,7 +1306,7 @@ rescale_both(scale=1) -> self
         if dirty is not True and last_args is not None:
             if Rect(last_args[0]) == rect:
                 # same size as last time
-                if dirty:
+                if dirty and not transform_cache.shared(dest):
                     # clip dirty rects inside cropped rect; if there's a
                     # border, it remains empty as before, so isn't dirtied
                     new_dirty = []
@@ -1108,7 +1318,7 @@ rescale_both(scale=1) -> self
                             new_dirty.append(s)
                             dest.blit(src, s, r)
                     return (dest, new_dirty)
-                else:
+                elif not dirty:
                     return (dest, False)
 
         if start == rect:
@@ -1116,12 +1326,19 @@ rescale_both(scale=1) -> self
             return (src, dirty if last_args is None else True)
 
         # do a full transform
-        if start.contains(rect) and not has_alpha(src):
-            new_sfc = pg.Surface(rect.size)
-        else:
-            # not (no longer) opaque
-            new_sfc = blank_sfc(rect.size)
-        new_sfc.blit(src, ((0, 0), rect.size), rect)
+        key = ('crop', tuple(rect))
+        new_sfc = transform_cache.get(src, *key)
+        if new_sfc is None:
+            # not (no longer) opaque if not fully covered
+            alpha = not start.contains(rect) or has_alpha(src)
+            new_sfc = self._transform_dest('crop', src, dest, rect.size, alpha)
+            if alpha:
+                new_sfc.fill((0, 0, 0, 0))
+            new_sfc.blit(src, ((0, 0), rect.size), rect)
+            # share the result unless the rect is changing
+            if new_sfc is not dest and (last_args is None or
+                                        Rect(last_args[0]) == rect):
+                transform_cache.put(src, new_sfc, *key)
         return (new_sfc, True)
 
     def crop (self, rect):
@@ -1155,15 +1372,18 @@ crop(rect) -> self
                 w, h = src.get_rect().size
                 alpha = has_alpha(src)
                 k = 5 if alpha else 3.5
-                if k * sum(r[2] * r[3] for r in dirty) ** .75 < w * h ** .75:
+                # can't alter a result shared with other graphics
+                if (k * sum(r[2] * r[3] for r in dirty) ** .75 < w * h ** .75
+                    and not transform_cache.shared(dest)):
                     # it would (this is all empirical and quite rough)
                     new_dirty = []
                     flip = pg.transform.flip
                     for r in dirty:
-                        # copy this rect to a new surface
-                        sfc = pg.Surface(r.size)
+                        # copy this rect to a spare surface
+                        sfc = surface_pool.get(r.size, alpha)
                         if alpha:
-                            sfc = sfc.convert_alpha()
+                            # as a new surface would be
+                            sfc.fill((0, 0, 0, 255))
                         sfc.blit(src, (0, 0), r)
                         # transform the rect
                         r = Rect((w - r.x - r.w if x else r.x,
@@ -1171,6 +1391,7 @@ crop(rect) -> self
                         new_dirty.append(r)
                         # flip and blit to destination
                         dest.blit(flip(sfc, x, y), r)
+                        surface_pool.put(sfc)
                     return (dest, new_dirty)
             else:
                 return (dest, False)
@@ -1180,7 +1401,10 @@ crop(rect) -> self
             return (src, dirty if last_args is None else True)
 
         # do a full transform
-        new_sfc = pg.transform.flip(src, x, y)
+        new_sfc = transform_cache.get(src, 'flip', x, y)
+        if new_sfc is None:
+            new_sfc = pg.transform.flip(src, x, y)
+            transform_cache.put(src, new_sfc, 'flip', x, y)
         return (new_sfc, True)
 
     def flip (self, x = False, y = False):
@@ -1220,12 +1444,22 @@ flip(x = False, y = False) -> self
             return (src, dirty if last_args is None else True)
 
         # full transform
-        if not has_alpha(src):
-            src = src.convert_alpha()
-        new_sfc = pg.Surface(src.get_size()).convert_alpha()
-        new_sfc.fill(colour)
-        if colour[3] > 0:
-            new_sfc.blit(src, (0, 0), special_flags=pg.BLEND_RGBA_MULT)
+        new_sfc = transform_cache.get(src, 'tint', colour)
+        if new_sfc is None:
+            orig_src = src
+            if not has_alpha(src):
+                src = src.convert_alpha()
+            new_sfc = self._transform_dest('tint', orig_src, dest,
+                                           src.get_size(), True)
+            new_sfc.fill(colour)
+            if colour[3] > 0:
+                new_sfc.blit(src, (0, 0), special_flags=pg.BLEND_RGBA_MULT)
+            # share the result unless the colour is changing
+            if new_sfc is not dest and (
+                last_args is None or
+                normalise_colour(last_args[0]) == colour
+            ):
+                transform_cache.put(orig_src, new_sfc, 'tint', colour)
         return (new_sfc, True)
 
     def tint (self, colour):
@@ -1268,11 +1502,21 @@ opacify(opacity) -> self
 
         return ((apply_fn, undo_fn), src_sz)
 
+    def _snap_angle (self, angle):
+        # get the angle actually rotated by, according to rotate_steps
+        steps = self._rotate_steps
+        if steps:
+            step = 2 * pi / steps
+            angle = (ir(angle / step) % steps) * step
+        return angle
+
     def _rotate (self, src, dest, dirty, last_args, angle):
+        angle = self._snap_angle(angle)
         if not dirty and last_args is not None:
             # if last_angle == angle, then surface size didn't change, so
             # neither did the centre point
-            if abs(angle - last_args[0]) < self.rotate_threshold:
+            if abs(angle - self._snap_angle(last_args[0])) < \
+               self.rotate_threshold:
                 # no change to result
                 return (dest, False)
 
@@ -1280,12 +1524,38 @@ opacify(opacity) -> self
             # transform does nothing
             return (src, dirty if last_args is None else True)
 
+        rotate_fn = self.rotate_fn
+        steps = self._rotate_steps
+        if steps:
+            # look in the atlas of rotated surfaces
+            atlas = self._rot_atlas
+            if (dirty or atlas is None or atlas[0]() is not src or
+                atlas[1] is not rotate_fn or atlas[2] != steps):
+                # source changed: start again; don't keep the source alive, in
+                # case keep_transformed drops it
+                atlas = self._rot_atlas = [ref(src), rotate_fn, steps, {}, 0]
+            step = ir(angle * steps / (2 * pi))
+            new_sfc = atlas[3].get(step)
+            if new_sfc is not None:
+                return (new_sfc, True)
+        else:
+            self._rot_atlas = None
+
         # do a full transform
-        # if not already alpha and we might end up with borders, convert to
-        # alpha
-        if angle % (pi / 2) != 0 and not has_alpha(src):
-            src = src.convert_alpha()
-        new_sfc = self.rotate_fn(src, angle)
+        new_sfc = transform_cache.get(src, 'rotate', angle, rotate_fn)
+        if new_sfc is None:
+            orig_src = src
+            # if not already alpha and we might end up with borders, convert
+            # to alpha
+            if angle % (pi / 2) != 0 and not has_alpha(src):
+                src = src.convert_alpha()
+            new_sfc = rotate_fn(src, angle)
+            transform_cache.put(orig_src, new_sfc, 'rotate', angle, rotate_fn)
+        if steps:
+            size = atlas[4] + _measure_img(new_sfc)
+            if size <= conf.ROTATE_ATLAS_SIZE:
+                atlas[3][step] = new_sfc
+                atlas[4] = size
         return (new_sfc, True)
 
     def rotate (self, angle):
@@ -1323,10 +1593,12 @@ does, but will be an exact copy of the *current state*.
 """
         self.render()
         sfc = self._surface.copy() if copy else self._surface
-        g = Graphic(sfc, self._postrot_rect.topleft, self._layer,
-                    self.blit_flags)
-        for attr in ('visible', 'scale_fn', 'rotate_fn', 'rotate_threshold',
-                     'anchor', 'rot_anchor'):
+        vx, vy = self._view_offset
+        g = Graphic(sfc, self._postrot_rect.move(-vx, -vy).topleft,
+                    self._layer, self.blit_flags)
+        for attr in ('visible', 'scale_fn', 'mipmap', 'scale_step',
+                     'rotate_fn', 'rotate_threshold', 'rotate_steps',
+                     'keep_transformed', 'anchor', 'rot_anchor'):
             setattr(g, attr, getattr(self, attr))
         return g
 
@@ -1351,7 +1623,8 @@ This may not be used on subclasses that define a ``child`` property.
             is_view = True
             _faked_attrs = (
                 '_rect', 'last_rect', '_postrot_rect', '_last_postrot_rect',
-                'visible', 'was_visible', '_layer',
+                '_view_offset', '_last_view_offset',
+                'visible', 'was_visible', '_layer', '_owner_index',
                 # Owned
                 'max_owners', '_on_full', '_owners'
             )
@@ -1363,6 +1636,7 @@ This may not be used on subclasses that define a ``child`` property.
                 self.child = graphic
                 for attr in self._faked_attrs:
                     setattr(self, attr, getattr(graphic, attr))
+                self._owner_index = None
                 Owned.__init__(self, 1)
 
             def __getattr__ (self, attr):
@@ -1389,6 +1663,7 @@ as dirty.  If none are given, the whole of the graphic is flagged.
 
 """
         dirty = [Rect(r) for r in rects] if rects else True
+        transform_cache.touch(self._orig_sfc)
         self._orig_dirty = combine_drawn(self._orig_dirty, dirty)
         self._call_cbs('draw orig')
 
@@ -1414,6 +1689,20 @@ surface.
             i = min(i, *(last_t_ks.index(fn) for fn in q if fn in last_t_ks))
         else:
             i = len(t_ks)
+        for j, fn in enumerate(t_ks[:i]):
+            if fn != last_t_ks[j]:
+                # differ from last transform order at this point
+                i = j
+                break
+        if i < len(t_ks):
+            # start from the nearest surface that was kept
+            for j in xrange(i - 1, -1, -1):
+                fn = t_ks[j]
+                if fn in ts:
+                    if isinstance(ts[fn][2], _Dropped):
+                        i = j
+                    else:
+                        break
         # apply transforms
         orig_final_sfc = self._surface
         before_rot = sfc = self._orig_sfc
@@ -1423,7 +1712,7 @@ surface.
                 # differ from last transform order at this point
                 dirty = True
                 i = j
-            if not dirty and fn not in q and fn in ts:
+            if j < i and not dirty and fn not in q and fn in ts:
                 # nothing is different at this point
                 # grab surface to start next transform at
                 sfc = ts[fn][2]
@@ -1437,6 +1726,10 @@ surface.
             if fn in ts:
                 # done this transform before
                 last_args, src, dest, apply_fn, undo_fn = ts[fn]
+                if isinstance(dest, _Dropped):
+                    # wasn't kept: transform again from scratch
+                    dest = None
+                    dirty = True
             else:
                 last_args = dest = None
             if fn in q:
@@ -1450,6 +1743,15 @@ surface.
                 continue
             f = getattr(self, '_' + fn) if isinstance(fn, basestring) else fn
             new_sfc, dirty = f(sfc, dest, dirty, last_args, *args)
+            if dirty and dest is not None:
+                if new_sfc is dest:
+                    # altered in place, so results transformed from it are
+                    # stale
+                    transform_cache.touch(new_sfc)
+                elif (dest is not orig_final_sfc and
+                      surface_pool.owner(dest) == (id(self), fn)):
+                    # replaced our own surface, which nothing else uses
+                    surface_pool.put(dest)
             if dirty or dest is None:
                 # transformed for the first time or something changed in
                 # retransforming
@@ -1469,7 +1771,7 @@ surface.
         if self._must_apply_rot:
             self._must_apply_rot = False
             # compute draw offset due to rotation
-            angle = ts['rotate'][0][0]
+            angle = self._snap_angle(ts['rotate'][0][0])
             w_orig, h_orig = before_rot.get_size()
             w, h = sfc.get_size()
             ax, ay = pos_in_rect(self.rot_anchor, (w_orig, h_orig))
@@ -1489,12 +1791,123 @@ surface.
             self._surface = sfc
             self.opaque = not has_alpha(sfc)
             self._rect = r = Rect(self._rect.topleft, before_rot.get_size())
-            self._postrot_rect = pr = r.move(self._rot_offset)
+            self._postrot_rect = pr = r.move(self._rot_offset) \
+                                       .move(self._view_offset)
             pr.size = sfc.get_size()
             if sfc != orig_final_sfc:
                 self._call_cbs('change', orig_final_sfc, sfc)
             else:
                 self._call_cbs('draw')
+        if i < len(t_ks):
+            self._drop_transformed()
+
+    def _replay (self, transform_fn):
+        # recompute the surface a transform was last applied to, from the
+        # nearest kept surface, without changing the graphic's transformation
+        # state (results still go in transform_cache as usual, and any surfaces
+        # from surface_pool are recorded as owned until they're freed)
+        ts = self._transforms
+        t_ks = self.transforms
+        sfc = self._orig_sfc
+        # transforms replace these for a new source
+        mips = self._mips
+        atlas = self._rot_atlas
+        try:
+            for fn in t_ks[:t_ks.index(transform_fn)]:
+                if fn in ts:
+                    args, src, dest = ts[fn][:3]
+                    if isinstance(dest, _Dropped):
+                        f = (getattr(self, '_' + fn)
+                             if isinstance(fn, basestring) else fn)
+                        sfc = f(sfc, None, True, None, *args)[0]
+                    else:
+                        sfc = dest
+        finally:
+            self._mips = mips
+            self._rot_atlas = atlas
+        return sfc
+
+    def _drop_transformed (self):
+        # replace transformed surfaces not to be kept with their sizes
+        keep = self._keep_transformed
+        if keep is None:
+            keep = conf.KEEP_TRANSFORMED
+        if keep == 'all':
+            return
+        ts = self._transforms
+        # compare by identity
+        kept = set((id(self._orig_sfc), id(self._surface)))
+        if keep == 'checkpoints':
+            for fn in self._expensive_transforms:
+                if fn in ts:
+                    kept.add(id(ts[fn][1]))
+        for fn, (args, src, dest, apply_fn, undo_fn) in ts.items():
+            if id(src) not in kept and not isinstance(src, _Dropped):
+                src = _Dropped(src.get_size())
+            if id(dest) not in kept and not isinstance(dest, _Dropped):
+                dest = _Dropped(dest.get_size())
+            ts[fn] = (args, src, dest, apply_fn, undo_fn)
+
+    def transform_memory (self):
+        """Get the amount of memory used by transformed surfaces.
+
+transform_memory() -> usage
+
+:return: ``{name: size}``, where ``size`` is in bytes.  ``name`` is each
+         applied transformation in :attr:`transforms`, giving the size of its
+         result (``0`` if it does nothing or its result isn't kept---see
+         :attr:`keep_transformed`), and also ``'mipmap'`` and
+         ``'rotate_steps'`` for the surfaces kept for :attr:`mipmap` and
+         :attr:`rotate_steps`.  Surfaces shared with other graphics through
+         :data:`transform_cache <engine.gfx.util.transform_cache>` are
+         included.
+
+"""
+        usage = {}
+        orig_sfc = self._orig_sfc
+        for fn, t in self._transforms.iteritems():
+            src, dest = t[1:3]
+            if (dest is src or dest is orig_sfc or
+                isinstance(dest, _Dropped)):
+                usage[fn] = 0
+            else:
+                usage[fn] = _measure_img(dest)
+        mips = self._mips
+        usage['mipmap'] = (0 if mips is None
+                           else sum(_measure_img(s) for s in mips[2]))
+        atlas = self._rot_atlas
+        usage['rotate_steps'] = 0 if atlas is None else atlas[4]
+        return usage
+
+    def _cull_rect (self):
+        """Get a rect containing the area the graphic will cover when next
+drawn, without rendering it, or ``None`` if this isn't known."""
+        r = self._rect.move(self._view_offset)
+        if not self._queued_transforms and not self._orig_dirty and \
+           self.transforms == self._last_transforms:
+            # only the position can have changed since rendering
+            return Rect(r.move(self._rot_offset).topleft,
+                        self._postrot_rect.size)
+        elif len(self.transforms) > len(self._builtin_transforms):
+            # custom transforms can do anything
+            return None
+        elif self._angle:
+            # rotating about any point in the rect stays within this
+            d = int(ceil(hypot(r[2], r[3])))
+            return r.inflate(2 * d, 2 * d)
+        else:
+            # builtin transforms update the pre-rotation rect when queued
+            return r
+
+    def _set_view_offset (self, offset):
+        """Called by
+:class:`GraphicsManager <engine.gfx.container.GraphicsManager>` to scroll the
+graphic."""
+        vx, vy = self._view_offset
+        if offset != (vx, vy):
+            self._postrot_rect = self._postrot_rect.move(offset[0] - vx,
+                                                         offset[1] - vy)
+            self._view_offset = offset
 
     def _pre_draw (self):
         """Called by
@@ -1502,10 +1915,12 @@ surface.
 drawing."""
         self.render()
         dirty = self._dirty
-        if self._rect != self.last_rect:
+        if self._rect != self.last_rect or \
+           self._view_offset != self._last_view_offset:
             dirty = True
             self._postrot_rect = Rect(
-                self._rect.move(self._rot_offset).topleft,
+                self._rect.move(self._rot_offset).move(self._view_offset)
+                          .topleft,
                 self._postrot_rect.size
             )
         if self.blit_flags != self._last_blit_flags:
@@ -1523,6 +1938,14 @@ drawing."""
         else:
             dirty = []
         self._dirty = dirty
+        self._update_index()
+
+    def _update_index (self):
+        """Update the graphic's rect in its manager's spatial index, if
+any."""
+        index = self._owner_index
+        if index is not None:
+            index.set(self, self._postrot_rect)
 
     def _draw (self, dest, rects):
         """Draw the graphic.
@@ -1536,13 +1959,14 @@ Should never alter any state that is not internal to the graphic.
 
 """
         sfc = self._surface
-        blit = dest.blit
         pr = self._postrot_rect
-        offset = (-pr[0], -pr[1])
-        for r in rects:
-            blit(sfc, r, r.move(offset), self.blit_flags)
+        x = -pr[0]
+        y = -pr[1]
+        flags = self.blit_flags
+        blit_many(dest, [(sfc, r, r.move(x, y), flags) for r in rects])
         self._last_postrot_rect = pr
         self.last_rect = self._rect
+        self._last_view_offset = self._view_offset
 
     def cb (self, cb, *evts):
         """Register a callback for a number of events.
@@ -1621,3 +2045,226 @@ Missing items are ignored.
             self._evts.get(None, set())
         ):
             cb(evt, *args)
+
+
+class Sprite (object):
+    """A minimal graphic, for when there are very many of them.
+
+Sprite(img, pos=(0, 0), layer=0, pool=conf.DEFAULT_RESOURCE_POOL,
+       res_mgr=conf.GAME.resources)
+
+Arguments are as taken by :class:`Graphic`.
+
+This can be added to a
+:class:`GraphicsManager <engine.gfx.container.GraphicsManager>` like a
+:class:`Graphic`, but uses ``__slots__`` and stores only its image, position,
+layer and drawing state, so takes a fraction of the memory.  There are no
+transformations or callbacks: to change what's drawn, set :attr:`surface` (to,
+say, the :attr:`Graphic.surface` of a transformed graphic shared between
+sprites).  Like a :class:`Graphic`, it can only have one owner.
+
+"""
+
+    __slots__ = ('_surface', '_opaque', '_rect', '_postrot_rect',
+                 '_last_postrot_rect', '_view_offset', '_last_view_offset',
+                 '_layer', '_owner', '_release_cb', '_dirty', '_blit_flags',
+                 '_owner_index', 'visible', 'was_visible')
+
+    def __init__ (self, img, pos=(0, 0), layer=0,
+                  pool=conf.DEFAULT_RESOURCE_POOL, res_mgr=None):
+        if isinstance(img, basestring):
+            if res_mgr is None:
+                res_mgr = conf.GAME.resources
+            img = res_mgr.img(img, pool=pool)
+        self._surface = img
+        self._opaque = not has_alpha(img)
+        self._postrot_rect = self._last_postrot_rect = self._rect = \
+            Rect(pos, img.get_size())
+        self._view_offset = self._last_view_offset = (0, 0)
+        self._layer = layer
+        self._owner = self._release_cb = None
+        self._dirty = []
+        self._blit_flags = 0
+        self._owner_index = None
+        #: As for :attr:`Graphic.visible`.
+        self.visible = True
+        #: As for :attr:`Graphic.was_visible`.
+        self.was_visible = False
+
+    # ownership, compatible with Owned with max_owners=1
+
+    @property
+    def owner (self):
+        """As for :attr:`Graphic.owner`."""
+        return self._owner
+
+    def own (self, owner_id, release_cb=None):
+        """As for :meth:`Owned.own() <engine.util.Owned.own>`."""
+        if owner_id is None:
+            raise ValueError('owner_id cannot be None')
+        if self._owner is None:
+            self._owner = owner_id
+            self._release_cb = release_cb
+            return True
+        elif self._owner == owner_id:
+            return False
+        else:
+            raise OwnError('{} already has the maximum number of owners '
+                           '(1)'.format(self))
+
+    def release (self, owner_id):
+        """As for :meth:`Owned.release() <engine.util.Owned.release>`."""
+        if owner_id is not None and owner_id == self._owner:
+            release_cb = self._release_cb
+            self._owner = self._release_cb = None
+            if release_cb is not None:
+                release_cb(self, owner_id)
+
+    # appearance
+
+    @property
+    def surface (self):
+        """The surface that is drawn; may be set to any converted surface."""
+        return self._surface
+
+    @surface.setter
+    def surface (self, sfc):
+        if sfc is not self._surface:
+            self._surface = sfc
+            self._opaque = not has_alpha(sfc)
+            size = sfc.get_size()
+            if size != self._rect.size:
+                self._rect = Rect(self._rect.topleft, size)
+            else:
+                self._dirty = True
+
+    @property
+    def opaque (self):
+        """Whether :attr:`surface` is completely opaque."""
+        return self._opaque
+
+    @property
+    def blit_flags (self):
+        """As for :attr:`Graphic.blit_flags`."""
+        return self._blit_flags
+
+    @blit_flags.setter
+    def blit_flags (self, flags):
+        if flags != self._blit_flags:
+            self._blit_flags = flags
+            self._dirty = True
+
+    @property
+    def layer (self):
+        """As for :attr:`Graphic.layer`."""
+        return self._layer
+
+    @layer.setter
+    def layer (self, layer):
+        if layer != self._layer:
+            # change layer in gm by removing, setting attribute, then adding
+            m = self._owner
+            if hasattr(m, 'rm'):
+                m.rm(self)
+            self._layer = layer
+            if hasattr(m, 'add'):
+                m.add(self)
+
+    # position
+
+    @property
+    def rect (self):
+        """``pygame.Rect`` giving the area covered; may not be altered
+in-place."""
+        return self._rect
+
+    @property
+    def postrot_rect (self):
+        """As for :attr:`Graphic.postrot_rect`."""
+        return self._postrot_rect
+
+    @property
+    def x (self):
+        """``x`` co-ordinate of the top-left corner of :attr:`rect`."""
+        return self._rect[0]
+
+    @x.setter
+    def x (self, x):
+        self.move_to(x)
+
+    @property
+    def y (self):
+        """``y`` co-ordinate of the top-left corner of :attr:`rect`."""
+        return self._rect[1]
+
+    @y.setter
+    def y (self, y):
+        self.move_to(y=y)
+
+    @property
+    def pos (self):
+        """``(``:attr:`x` ``,`` :attr:`y` ``)``."""
+        return self._rect.topleft
+
+    @pos.setter
+    def pos (self, pos):
+        self.move_to(*pos)
+
+    @property
+    def size (self):
+        """The size of :attr:`surface`."""
+        return self._rect.size
+
+    def move_to (self, x=None, y=None):
+        """As for :meth:`Graphic.move_to`."""
+        r = self._rect
+        x = r[0] if x is None else ir(x)
+        y = r[1] if y is None else ir(y)
+        if x != r[0] or y != r[1]:
+            self._rect = Rect(x, y, r[2], r[3])
+        return self
+
+    def move_by (self, dx=0, dy=0):
+        """As for :meth:`Graphic.move_by`."""
+        r = self._rect
+        return self.move_to(r[0] + dx, r[1] + dy)
+
+    # drawing
+
+    def _set_view_offset (self, offset):
+        if offset != self._view_offset:
+            vx, vy = self._view_offset
+            self._postrot_rect = self._postrot_rect.move(offset[0] - vx,
+                                                         offset[1] - vy)
+            self._view_offset = offset
+            if self._owner_index is not None:
+                self._owner_index.set(self, self._postrot_rect)
+
+    def _cull_rect (self):
+        vx, vy = self._view_offset
+        return self._rect.move(vx, vy) if vx or vy else self._rect
+
+    def _opaque_in (self, rect):
+        return self.visible and self._opaque and \
+               self._postrot_rect.contains(rect)
+
+    def _pre_draw (self):
+        r = self._cull_rect()
+        if r != self._postrot_rect or \
+           self._view_offset != self._last_view_offset:
+            self._dirty = [self._last_postrot_rect, r]
+            self._postrot_rect = r
+            if self._owner_index is not None:
+                self._owner_index.set(self, r)
+        elif self._dirty is True:
+            self._dirty = [r]
+
+    def _draw (self, dest, rects):
+        sfc = self._surface
+        pr = self._postrot_rect
+        x = -pr[0]
+        y = -pr[1]
+        flags = self._blit_flags
+        blit_many(dest, [(sfc, r, r.move(x, y), flags) for r in rects])
+        self._last_postrot_rect = pr
+        self._last_view_offset = self._view_offset
@@ -22,6 +22,8 @@ TODO:
 """
 
 from os.path import splitext
+from array import array
+from itertools import izip
 
 import pygame as pg
 from pygame import Rect
@@ -30,6 +32,7 @@ from ..conf import conf
 from ..text import option_defaults as text_option_defaults
 from .. import util as gameutil
 from .graphic import Graphic
+from .util import blit_many
 
 
 class Colour (Graphic):
@@ -238,7 +241,8 @@ class Animation (Graphic):
     """An animated graphic.
 
 Animation(imgs, pos=(0, 0), layer=0[, scheduler],
-          pool=conf.DEFAULT_RESOURCE_POOL, res_mgr=conf.GAME.resources)
+          pool=conf.DEFAULT_RESOURCE_POOL, res_mgr=conf.GAME.resources
+          [, domain])
 
 :arg imgs:
     a sequence of images as part of the animation; each can be a Pygame
@@ -253,6 +257,9 @@ Animation(imgs, pos=(0, 0), layer=0[, scheduler],
                 when the graphic is contained by a
                 :class:`GraphicsManager <engine.gfx.container.GraphicsManager>`
                 (and trying to do so otherwise raises ``RuntimeError``).
+:arg domain: the name of the
+             :class:`sched.TimeDomain <engine.sched.TimeDomain>` to time frames
+             in.
 
 Other arguments are as taken by :class:`Graphic <engine.gfx.graphic.Graphic>`.
 
@@ -265,7 +272,7 @@ For example, to play the frames in a spritemap consisting of a single row::
 
 """
     def __init__ (self, imgs, pos=(0, 0), layer=0, scheduler=None,
-                  pool=conf.DEFAULT_RESOURCE_POOL, res_mgr=None):
+                  pool=conf.DEFAULT_RESOURCE_POOL, res_mgr=None, domain=None):
         self._resource_pool = pool
         self._resource_manager = res_mgr
         if len(imgs) == 0:
@@ -291,6 +298,9 @@ For example, to play the frames in a spritemap consisting of a single row::
         self._speed = 1
         #: The ``scheduler`` argument passed to the constructor.
         self.scheduler = scheduler
+        #: The ``domain`` argument passed to the constructor.  Changes do not
+        #: take effect until the next sequence is played.
+        self.domain = domain
 
         #: The currently playing sequence (name), or ``None``.
         self.playing = None
@@ -485,7 +495,7 @@ Missing items are ignored.
         if self._new_frame_time is not None:
             # adjust speed for next frame
             self._timer_id = self._get_sched().add_timeout(
-                self._next_frame, self._new_frame_time
+                self._next_frame, self._new_frame_time, domain=self.domain
             )
             self._new_frame_time = None
             return False
@@ -540,7 +550,8 @@ If a sequence is already being played, that sequence is canceled.
             self._frame_time_source = 'runtime'
         frame_time = float(frame_time) / self._speed
         # start the scheduler
-        self._timer_id = s.add_timeout(self._next_frame, frame_time)
+        self._timer_id = s.add_timeout(self._next_frame, frame_time,
+                                       domain=self.domain)
         self._playing_frame_time = frame_time
         self._playing_cb = cb
         return self
@@ -651,6 +662,222 @@ unqueue(*names) -> self
         Graphic.render(self)
 
 
+class Instances (Graphic):
+    """One image drawn at many positions.
+
+Instances(img, positions=(), pos=(0, 0), layer=0,
+          pool=conf.DEFAULT_RESOURCE_POOL, res_mgr=conf.GAME.resources)
+
+:arg img: as taken by :class:`Graphic <engine.gfx.graphic.Graphic>`.
+:arg positions: sequence of ``(x, y)`` positions to :meth:`add` instances at.
+
+Other arguments are as taken by :class:`Graphic <engine.gfx.graphic.Graphic>`.
+
+This is much cheaper than a separate graphic (or
+:meth:`view <engine.gfx.graphic.Graphic.view>`) for each copy of something like
+a bullet or a tree: there is a single transformation pipeline, instance
+positions are stored compactly, and a
+:class:`GraphicsManager <engine.gfx.container.GraphicsManager>` treats this as
+a single graphic, with changed areas worked out in bulk and all instances drawn
+together.
+
+Instances are identified by indices returned from :meth:`add`, and each is
+drawn at its position relative to
+:attr:`pos <engine.gfx.graphic.Graphic.pos>`, with transformations applied to
+all of them.  They are all in the same :attr:`layer
+<engine.gfx.graphic.Graphic.layer>`, and where they overlap, those with
+greater indices are drawn on top.  :attr:`rect
+<engine.gfx.graphic.Graphic.rect>` is the area covered by an instance at
+position ``(0, 0)``, and :attr:`postrot_rect
+<engine.gfx.graphic.Graphic.postrot_rect>` covers all visible instances as of
+the last draw.
+
+"""
+
+    def __init__ (self, img, positions=(), pos=(0, 0), layer=0,
+                  pool=conf.DEFAULT_RESOURCE_POOL, res_mgr=None):
+        self._xs = array('i')
+        self._ys = array('i')
+        self._shown = bytearray()
+        self._free = []
+        # {index: (x, y, shown)} as of the last draw, for changed instances
+        self._old = {}
+        self._all_changed = True
+        # on-screen rects of shown instances, view offset and covered area as
+        # of the last draw
+        self._draw_rects = []
+        self._drawn_view = (0, 0)
+        self._drawn_bbox = None
+        Graphic.__init__(self, img, pos, layer, pool, res_mgr)
+        self._drawn_bbox = Rect(self._postrot_rect.topleft, (0, 0))
+        self.add(*positions)
+
+    def _changed (self, i):
+        if not self._all_changed and i not in self._old:
+            self._old[i] = (self._xs[i], self._ys[i], self._shown[i])
+
+    def add (self, *positions):
+        """Add instances.
+
+add(*positions) -> indices
+
+:arg positions: any number of ``(x, y)`` positions.
+
+:return: a list of indices identifying the new instances.  Indices of removed
+         instances are reused.
+
+"""
+        xs = self._xs
+        ys = self._ys
+        shown = self._shown
+        free = self._free
+        indices = []
+        for x, y in positions:
+            if free:
+                i = free.pop()
+                self._changed(i)
+                xs[i] = gameutil.ir(x)
+                ys[i] = gameutil.ir(y)
+                shown[i] = 1
+            else:
+                i = len(xs)
+                if not self._all_changed:
+                    self._old[i] = (0, 0, 0)
+                xs.append(gameutil.ir(x))
+                ys.append(gameutil.ir(y))
+                shown.append(1)
+            indices.append(i)
+        return indices
+
+    def rm (self, *indices):
+        """Remove instances, given their indices."""
+        shown = self._shown
+        for i in indices:
+            if shown[i] != 2:
+                self._changed(i)
+                # 2 is removed
+                shown[i] = 2
+                self._free.append(i)
+
+    def instance (self, i):
+        """Get an instance's ``(x, y)`` position and whether it's visible."""
+        return (self._xs[i], self._ys[i], self._shown[i] == 1)
+
+    def move_instance (self, i, x, y):
+        """Move an instance to the given position."""
+        x = gameutil.ir(x)
+        y = gameutil.ir(y)
+        if x != self._xs[i] or y != self._ys[i]:
+            self._changed(i)
+            self._xs[i] = x
+            self._ys[i] = y
+
+    def move_instances (self, moves):
+        """Move any number of instances.
+
+:arg moves: sequence of ``(index, x, y)``.
+
+"""
+        move = self.move_instance
+        for i, x, y in moves:
+            move(i, x, y)
+
+    def show_instance (self, i, visible=True):
+        """Set whether an instance is visible.
+
+Raises ``ValueError`` if the instance was removed.
+
+"""
+        visible = int(bool(visible))
+        shown = self._shown[i]
+        if shown == 2:
+            raise ValueError('instance {0} was removed'.format(i))
+        if shown != visible:
+            self._changed(i)
+            self._shown[i] = visible
+
+    def _opaque_in (self, rect):
+        # instances probably don't cover the area between them
+        return False
+
+    def _cull_rect (self):
+        if self._all_changed or self._old or \
+           self._rect != self.last_rect or Graphic._cull_rect(self) is None:
+            return None
+        vx, vy = self._view_offset
+        dvx, dvy = self._drawn_view
+        return self._drawn_bbox.move(vx - dvx, vy - dvy)
+
+    def _pre_draw (self):
+        self.render()
+        view = self._view_offset
+        last_view = self._last_view_offset
+        full = (self._all_changed or self._dirty or
+                self._rect != self.last_rect or view != last_view or
+                self.blit_flags != self._last_blit_flags)
+        old = self._old
+        # the surface may have been scrolled since the last draw
+        dx = last_view[0] - self._drawn_view[0]
+        dy = last_view[1] - self._drawn_view[1]
+        ox, oy = self._rect.move(self._rot_offset).topleft
+        w, h = self._surface.get_size()
+        vx, vy = view
+        if full or old or dx or dy:
+            x0 = ox + vx
+            y0 = oy + vy
+            rects = [Rect(x0 + x, y0 + y, w, h)
+                     for x, y, s in izip(self._xs, self._ys, self._shown)
+                     if s == 1]
+        else:
+            rects = self._draw_rects
+        if full:
+            dirty = [r.move(dx, dy) for r in self._draw_rects] + rects
+        else:
+            # view is last_view, and the image and origin haven't changed
+            dirty = []
+            xs = self._xs
+            ys = self._ys
+            shown = self._shown
+            x0 = ox + vx
+            y0 = oy + vy
+            for i, (x, y, s) in old.iteritems():
+                if s == 1:
+                    dirty.append(Rect(x0 + x, y0 + y, w, h))
+                if shown[i] == 1:
+                    dirty.append(Rect(x0 + xs[i], y0 + ys[i], w, h))
+        self._old = {}
+        self._all_changed = False
+        self._draw_rects = rects
+        self._drawn_view = self._last_view_offset = view
+        self.last_rect = self._rect
+        self._last_blit_flags = self.blit_flags
+        self._last_postrot_rect = self._drawn_bbox.move(dx, dy)
+        if rects:
+            bbox = rects[0].unionall(rects[1:])
+        else:
+            bbox = Rect(ox + vx, oy + vy, 0, 0)
+        self._postrot_rect = self._drawn_bbox = bbox
+        # fastdraw handles each rect separately, so pass on a bounded number
+        self._dirty = (gameutil.coalesce_rects(dirty, conf.DIRTY_RECT_COST,
+                                               conf.MAX_DIRTY_RECTS)
+                       if dirty else [])
+        self._update_index()
+
+    def _draw (self, dest, rects):
+        sfc = self._surface
+        flags = self.blit_flags
+        inst_rects = self._draw_rects
+        blits = []
+        for r in rects:
+            for i in r.collidelistall(inst_rects):
+                inst_r = inst_rects[i]
+                draw_r = inst_r.clip(r)
+                blits.append((sfc, draw_r,
+                              draw_r.move(-inst_r[0], -inst_r[1]), flags))
+        blit_many(dest, blits)
+        self._last_postrot_rect = self._postrot_rect
+
+
 class Tilemap (Graphic):
     """A finite, flat grid of tiles.
 
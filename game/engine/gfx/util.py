@@ -1,9 +1,14 @@
 """Utilities for graphics."""
 
+from collections import OrderedDict
+from threading import Lock
+from weakref import ref, WeakKeyDictionary, WeakSet
+
 import pygame as pg
 
 from ..conf import conf
 from .. import util
+from ..res import _measure_img
 
 
 class Spritemap (object):
@@ -119,3 +124,325 @@ implicit ``tuple``, so ``spritemap[(col, row)]`` works as well.)
                 raise IndexError('spritemap index out of bounds')
             i = row * ncols + col
         return self._sfcs[i]
+
+
+def blit_many (dest, blits):
+    """Blit a number of surfaces in one go.
+
+blit_many(dest, blits)
+
+:arg dest: ``pygame.Surface`` or :class:`BlitBatch` to draw to.
+:arg blits: sequence of ``(source, dest, area, special_flags)`` tuples, as taken
+            by ``pygame.Surface.blits``.
+
+This uses ``pygame.Surface.blits`` where available (Pygame 1.9.4 and later).
+
+"""
+    if hasattr(dest, 'blits'):
+        dest.blits(blits, False)
+    else:
+        blit = dest.blit
+        for args in blits:
+            blit(*args)
+
+
+class BlitBatch (object):
+    """Collects blits to a surface, to draw them all with a single call.
+
+BlitBatch(sfc)
+
+:arg sfc: the ``pygame.Surface`` to draw to.
+
+Calls to :meth:`blit` and :meth:`blits` are stored until :meth:`flush`, which
+passes them all to :func:`blit_many`.  Any other ``pygame.Surface`` attribute
+can be used through this object, and causes a :meth:`flush` first, so this can
+stand in for the surface when passing it to code that draws to it.
+:class:`GraphicsManager <engine.gfx.container.GraphicsManager>` passes one of
+these to graphics' drawing methods.
+
+"""
+
+    def __init__ (self, sfc):
+        #: The ``sfc`` argument passed to the constructor.
+        self.surface = sfc
+        self._blits = []
+
+    def blit (self, source, dest, area=None, special_flags=0):
+        """Like ``pygame.Surface.blit``, but returns ``None``."""
+        self._blits.append((source, dest, area, special_flags))
+
+    def blits (self, blit_sequence, doreturn=True):
+        """Like ``pygame.Surface.blits``, but returns ``None``."""
+        self._blits.extend(blit_sequence)
+
+    def flush (self):
+        """Draw all stored blits."""
+        blits = self._blits
+        if blits:
+            self._blits = []
+            blit_many(self.surface, blits)
+
+    def __getattr__ (self, attr):
+        self.flush()
+        return getattr(self.surface, attr)
+
+
+class TransformCache (object):
+    """A size-limited cache of the results of transforming surfaces.
+
+TransformCache([max_size])
+
+:arg max_size: initial value of :attr:`max_size`.
+
+Results are looked up by the source surface and the transformation's arguments,
+and the least recently used are dropped when the total size goes over the limit.
+:class:`Graphic <engine.gfx.graphic.Graphic>`'s builtin transformations use
+the shared instance :data:`transform_cache`, so graphics with the same image
+and the same transformations only compute the result once.
+
+Surfaces returned by :meth:`get` or passed to :meth:`put` may be used by any
+number of graphics, so must not be altered; :meth:`shared` identifies them.  A
+source surface that is altered in place must be passed to :meth:`touch` so that
+old results aren't used.
+
+"""
+
+    def __init__ (self, max_size=None):
+        #: Maximum total size of cached results in bytes, or ``None`` to use
+        #: :data:`conf.TRANSFORM_CACHE_SIZE <engine.conf.TRANSFORM_CACHE_SIZE>`.
+        #: ``0`` disables caching.
+        self.max_size = max_size
+        #: Total size of cached results in bytes.
+        self.size = 0
+        #: Number of successful lookups.
+        self.hits = 0
+        #: Number of failed lookups.
+        self.misses = 0
+        # {(id(src), version) + key: (src_ref, result, size)}, oldest first
+        self._items = OrderedDict()
+        self._versions = WeakKeyDictionary()
+        self._shared = WeakSet()
+        # transforms may run in multiple threads
+        self._lock = Lock()
+
+    def _limit (self):
+        max_size = self.max_size
+        return conf.TRANSFORM_CACHE_SIZE if max_size is None else max_size
+
+    def _key (self, src, key):
+        return (id(src), self._versions.get(src, 0)) + key
+
+    def get (self, src, *key):
+        """Look up a result.
+
+get(src, *key) -> result
+
+:arg src: the source surface.
+:arg key: hashable values determining the result, beginning with the
+          transformation's name.
+
+:return: the cached result, or ``None``.
+
+"""
+        if not self._limit():
+            return None
+        with self._lock:
+            k = self._key(src, key)
+            item = self._items.pop(k, None)
+            if item is not None:
+                if item[0]() is src:
+                    self._items[k] = item
+                    self.hits += 1
+                    return item[1]
+                # source died and its id got reused
+                self.size -= item[2]
+            self.misses += 1
+        return None
+
+    def put (self, src, result, *key):
+        """Store a result.
+
+put(src, result, *key)
+
+:arg src: the source surface.
+:arg result: the transformed surface.
+:arg key: as taken by :meth:`get`.
+
+"""
+        limit = self._limit()
+        size = _measure_img(result)
+        if size > limit:
+            return
+        with self._lock:
+            k = self._key(src, key)
+            item = self._items.pop(k, None)
+            if item is not None:
+                self.size -= item[2]
+            self._items[k] = (ref(src), result, size)
+            self._shared.add(result)
+            self.size += size
+            items = self._items
+            while self.size > limit:
+                self.size -= items.popitem(False)[1][2]
+
+    def touch (self, sfc):
+        """Note that a surface has been altered in place.
+
+touch(sfc)
+
+Results previously stored for this source surface won't be returned any more.
+
+"""
+        with self._lock:
+            self._versions[sfc] = self._versions.get(sfc, 0) + 1
+
+    def shared (self, sfc):
+        """Check whether a surface came from the cache.
+
+shared(sfc) -> is_shared
+
+:return: whether the surface was returned by :meth:`get` or passed to
+         :meth:`put`, and so must not be altered.
+
+"""
+        return sfc in self._shared
+
+    def clear (self):
+        """Drop all cached results and reset the counters."""
+        with self._lock:
+            self._items = OrderedDict()
+            # dropped results may be altered or reused again
+            self._shared = WeakSet()
+            self.size = self.hits = self.misses = 0
+
+
+#: The :class:`TransformCache` shared by all graphics.
+transform_cache = TransformCache()
+
+
+class SurfacePool (object):
+    """Spare surfaces kept for reuse, to avoid allocating new ones.
+
+SurfacePool([max_size])
+
+:arg max_size: initial value of :attr:`max_size`.
+
+Surfaces obtained from :meth:`get` are recorded with an owner, and can be given
+back with :meth:`put` once nothing uses them any more.  Only surfaces created by
+the pool are kept, so they all have the display's format; spare surfaces are
+grouped by size and by whether they have per-pixel alpha.
+:class:`Graphic <engine.gfx.graphic.Graphic>`'s builtin transformations use
+the shared instance :data:`surface_pool`.
+
+"""
+
+    def __init__ (self, max_size=None):
+        #: Maximum total size of spare surfaces in bytes, or ``None`` to use
+        #: :data:`conf.SURFACE_POOL_SIZE <engine.conf.SURFACE_POOL_SIZE>`.
+        self.max_size = max_size
+        #: Total size of spare surfaces in bytes.
+        self.size = 0
+        # {(size, alpha): sfcs}
+        self._sfcs = {}
+        # {sfc: owner} for surfaces handed out
+        self._owners = WeakKeyDictionary()
+        # surfaces created by get()
+        self._made = WeakSet()
+        self._lock = Lock()
+
+    def get (self, size, alpha=False, owner=None):
+        """Get a surface.
+
+get(size, alpha=False[, owner]) -> sfc
+
+:arg size: the surface's ``(width, height)``.
+:arg alpha: whether the surface should have per-pixel alpha.
+:arg owner: any value to record as the surface's owner (see :meth:`owner`).
+
+:return: a spare surface if there is one, else a new surface.  The contents
+         are undefined.
+
+"""
+        size = tuple(size)
+        with self._lock:
+            sfcs = self._sfcs.get((size, bool(alpha)))
+            if sfcs:
+                sfc = sfcs.pop()
+                self.size -= _measure_img(sfc)
+                self._owners[sfc] = owner
+                return sfc
+        # create outside the lock, since this is slow
+        sfc = pg.Surface(size)
+        if alpha:
+            sfc = sfc.convert_alpha()
+        with self._lock:
+            self._made.add(sfc)
+            self._owners[sfc] = owner
+        return sfc
+
+    def claim (self, sfc, owner=None):
+        """Record a surface created elsewhere as if it came from :meth:`get`.
+
+claim(sfc[, owner])
+
+The surface's owner is recorded, but it isn't kept for reuse when given back,
+since its format may differ from the pool's.
+
+"""
+        with self._lock:
+            self._owners[sfc] = owner
+
+    def owner (self, sfc):
+        """Get the owner passed to :meth:`get` or :meth:`claim` for a surface.
+
+owner(sfc) -> owner
+
+:return: the owner, or ``None`` if the surface isn't currently handed out.
+
+"""
+        with self._lock:
+            return self._owners.get(sfc)
+
+    def put (self, sfc):
+        """Give back a surface for reuse.
+
+put(sfc)
+
+Surfaces not handed out by :meth:`get` or :meth:`claim`, or that are in
+:data:`transform_cache`, are ignored.  Surfaces from :meth:`claim` stop being
+recorded, but aren't kept.  Any colorkey or surface alpha set on the surface is
+removed.
+
+"""
+        with self._lock:
+            if sfc not in self._owners or transform_cache.shared(sfc):
+                return
+            del self._owners[sfc]
+            if sfc not in self._made:
+                return
+            max_size = self.max_size
+            if max_size is None:
+                max_size = conf.SURFACE_POOL_SIZE
+            size = _measure_img(sfc)
+            if self.size + size > max_size:
+                return
+            alpha = bool(sfc.get_flags() & pg.SRCALPHA)
+            # a surface from get() should be the same as a new one
+            if sfc.get_colorkey() is not None:
+                sfc.set_colorkey(None)
+            if not alpha and sfc.get_alpha() is not None:
+                sfc.set_alpha(None)
+            self._sfcs.setdefault((sfc.get_size(), alpha), []).append(sfc)
+            self.size += size
+        # results transformed from this surface no longer apply
+        transform_cache.touch(sfc)
+
+    def clear (self):
+        """Drop all spare surfaces."""
+        with self._lock:
+            self._sfcs = {}
+            self.size = 0
+
+
+#: The :class:`SurfacePool` shared by all graphics.
+surface_pool = SurfacePool()
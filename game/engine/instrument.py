@@ -0,0 +1,185 @@
+"""Callback profiling and frame budget instrumentation."""
+
+import sys
+from timeit import default_timer as time
+
+
+def cb_label (cb):
+    """Get a readable name for a callback.
+
+cb_label(cb) -> label
+
+:arg cb: a function, method, ``functools.partial`` or other callable.
+
+:return: a string like ``'module.function'`` or ``'Class.method'``.
+
+"""
+    if hasattr(cb, 'func'):
+        # functools.partial
+        return cb_label(cb.func)
+    name = getattr(cb, '__name__', None)
+    if name is None:
+        return type(cb).__name__
+    obj = getattr(cb, '__self__', None)
+    if obj is not None:
+        cls = obj if isinstance(obj, type) else obj.__class__
+        return '{0}.{1}'.format(cls.__name__, name)
+    module = getattr(cb, '__module__', None)
+    return name if module is None else '{0}.{1}'.format(module, name)
+
+
+class Profiler (object):
+    """Records how long callbacks take to run, by category and label.
+
+Profiler(enabled=False[, dump_interval])
+
+:arg enabled: initial value of :attr:`enabled`.
+:arg dump_interval: initial value of :attr:`dump_interval`.
+
+Categories used by the engine are:
+
+- ``'timeout'``: :meth:`Scheduler <engine.sched.Scheduler>` timeouts and
+  :meth:`interpolations <engine.sched.Scheduler.interp>`, labelled by the
+  ``label`` given when they were added, else by the property interpolated or
+  the callback's name;
+- ``'interp'``: individual
+  :meth:`batched interpolations <engine.sched.Scheduler.interp_batched>`
+  (which are all advanced together, outside of any timeout);
+- ``'entity'``: :meth:`Entity.update <engine.entity.Entity.update>`, labelled by
+  class name;
+- ``'phase'``: the ``'events'``, ``'update'`` and ``'draw'`` phases of each
+  frame in :class:`Game <engine.game.Game>`.
+
+The :class:`Game <engine.game.Game>` instance has one of these in
+:attr:`Game.profiler <engine.game.Game.profiler>`, shared by the schedulers of
+all worlds.
+
+"""
+
+    def __init__ (self, enabled=False, dump_interval=None):
+        #: Whether to record anything.  While ``False``, instrumented code does
+        #: a single check per frame or per loop, and nothing else.
+        self.enabled = enabled
+        #: If not ``None``, :meth:`tick` calls :meth:`dump` this often, in
+        #: seconds of real time.
+        self.dump_interval = dump_interval
+        # {(category, label): [calls, total, max]}
+        self._stats = {}
+        self._last_dump = time()
+
+    def record (self, category, label, t):
+        """Record a call.
+
+record(category, label, t)
+
+:arg category: a category name, such as ``'timeout'``.
+:arg label: a name for the callback within the category.
+:arg t: the time the call took, in seconds.
+
+"""
+        stats = self._stats
+        key = (category, label)
+        s = stats.get(key)
+        if s is None:
+            stats[key] = [1, t, t]
+        else:
+            s[0] += 1
+            s[1] += t
+            if t > s[2]:
+                s[2] = t
+
+    def call (self, category, label, fn, *args):
+        """Call a function, recording how long it took if :attr:`enabled`.
+
+call(category, label, fn, *args) -> result
+
+:arg category,label: as taken by :meth:`record`.
+:arg fn: function to call with ``args``.
+
+:return: the function's return value.
+
+"""
+        if not self.enabled:
+            return fn(*args)
+        start = time()
+        result = fn(*args)
+        self.record(category, label, time() - start)
+        return result
+
+    def stats (self, category=None):
+        """Get recorded statistics.
+
+stats([category]) -> stats
+
+:arg category: if given, only return statistics for this category.
+
+:return: ``{(category, label): (calls, total, max)}``, or
+         ``{label: (calls, total, max)}`` if ``category`` is given.  Times are
+         in seconds.
+
+"""
+        if category is None:
+            return dict((k, tuple(s)) for k, s in self._stats.iteritems())
+        else:
+            return dict((k[1], tuple(s)) for k, s in self._stats.iteritems()
+                                         if k[0] == category)
+
+    def top (self, n=10, category=None, sort='total'):
+        """Get the most expensive callbacks.
+
+top(n=10[, category], sort='total') -> stats
+
+:arg n: maximum number of results to return.
+:arg category: if given, only include this category.
+:arg sort: the statistic to sort by: ``'total'``, ``'calls'``, ``'max'`` or
+           ``'mean'``.
+
+:return: a list of ``(category, label, calls, total, max)`` tuples, most
+         expensive first.
+
+"""
+        rows = [k + tuple(s) for k, s in self._stats.iteritems()
+                if category is None or k[0] == category]
+        key = {
+            'calls': lambda r: r[2],
+            'total': lambda r: r[3],
+            'max': lambda r: r[4],
+            'mean': lambda r: r[3] / r[2]
+        }[sort]
+        rows.sort(key=key, reverse=True)
+        return rows[:n]
+
+    def reset (self):
+        """Forget all recorded statistics."""
+        self._stats = {}
+
+    def dump (self, n=20, f=None, reset=True):
+        """Print the most expensive callbacks.
+
+dump(n=20[, f], reset=True)
+
+:arg n: the number of callbacks to show, as taken by :meth:`top`.
+:arg f: the file to write to; defaults to ``sys.stderr``.
+:arg reset: whether to call :meth:`reset` afterwards, so that each dump covers
+            the time since the last.
+
+"""
+        if f is None:
+            f = sys.stderr
+        print >> f, '{0:<8} {1:<40} {2:>7} {3:>9} {4:>9} {5:>9}'.format(
+            'category', 'label', 'calls', 'total/ms', 'mean/ms', 'max/ms')
+        for category, label, calls, total, max_t in self.top(n):
+            print >> f, '{0:<8} {1:<40} {2:>7} {3:>9.3f} {4:>9.3f} ' \
+                        '{5:>9.3f}'.format(category, label[:40], calls,
+                                           1000 * total,
+                                           1000 * total / calls, 1000 * max_t)
+        self._last_dump = time()
+        if reset:
+            self.reset()
+
+    def tick (self):
+        """Called once per frame to :meth:`dump` every :attr:`dump_interval`
+seconds."""
+        if self.enabled and self.dump_interval is not None and \
+           time() - self._last_dump >= self.dump_interval:
+            self.dump()
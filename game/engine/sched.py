@@ -1,17 +1,23 @@
 # coding=utf-8
 """Event scheduler and interpolation."""
 
-from time import time
+import sys
+from timeit import default_timer as time
+from threading import Thread
 from bisect import bisect
-from math import cos, atan, exp
+from heapq import heappush, heappop, heapify
+from math import cos, atan, exp, ceil
 from random import randrange, expovariate
 from functools import partial
+from itertools import izip
+from collections import deque
 
 from pygame.time import wait
 
 from .conf import conf
 from .util import ir, call_in_nest, bezier
 from .util.cb import CbManager
+from .instrument import cb_label
 
 
 def _match_in_nest (obj, x):
@@ -44,10 +50,121 @@ def _cmp_structure (x, y):
         return True
 
 
-def interp_linear (*waypoints):
+def _flatten_nums (v, nums):
+    """Append the numbers in a nested list structure to a list, in order."""
+    if isinstance(v, (tuple, list)):
+        for x in v:
+            _flatten_nums(x, nums)
+    elif isinstance(v, (int, float)):
+        nums.append(v)
+    return nums
+
+
+def _unflatten_nums (template, nums):
+    """Replace the numbers in a nested list structure with those from an
+iterator, as flattened by :func:`_flatten_nums`."""
+    if isinstance(template, (tuple, list)):
+        return [_unflatten_nums(x, nums) for x in template]
+    elif isinstance(template, (int, float)):
+        return nums.next()
+    else:
+        return template
+
+
+class BakedCurve (object):
+    """An interpolation curve sampled into a lookup table.
+
+BakedCurve(get_val, t, samples=64, arc_length=False)
+
+:arg get_val: a function giving the value at a time, like the ``get_val``
+              argument to :meth:`Scheduler.interp` (such as those returned by
+              the ``interp_*`` functions).  It is called once for each sample,
+              in order of increasing time, and is not used again.
+:arg t: the time in seconds to sample over, starting at ``0``.
+:arg samples: the number of values to sample (at least ``2``), equally spaced
+              in time.
+:arg arc_length: whether to reparameterise the curve by distance travelled, so
+                 that the value moves at constant speed over ``t`` (distance is
+                 Euclidean over all numbers in the value).
+
+Calling an instance with a time gives the value at that time, interpolated
+linearly between samples, or ``None`` if the time is greater than ``t``---so an
+instance can be used as ``get_val`` in :meth:`Scheduler.interp`, which sets the
+value at time ``t`` the first time it gets ``None``.  Since looking
+up values doesn't change anything, one instance can be used by any number of
+interpolations at once.  Values have the same structure as those returned by
+``get_val`` at time ``0``, with numbers in the same places; non-number objects
+are taken from that first value.
+
+"""
+
+    def __init__ (self, get_val, t, samples=64, arc_length=False):
+        if samples < 2:
+            raise ValueError('expected at least 2 samples')
+        #: The time in seconds the curve is sampled over.
+        self.duration = t
+        step = float(t) / (samples - 1)
+        vs = [get_val(i * step) for i in xrange(samples)]
+        self._template = vs[0]
+        self._scalar = isinstance(vs[0], (int, float))
+        if self._scalar:
+            table = [[v] for v in vs]
+        else:
+            table = [_flatten_nums(v, []) for v in vs]
+        if arc_length:
+            table = self._reparameterise(table)
+        self._table = table if not self._scalar else [v[0] for v in table]
+        self._scale = (samples - 1) / float(t) if t else 0
+        #: The value at the end of the curve.
+        self.final = self(t)
+
+    def _reparameterise (self, table):
+        """Resample a table of flattened values to equal distances apart."""
+        # cumulative distance at each sample
+        ds = [0]
+        for a, b in zip(table, table[1:]):
+            ds.append(ds[-1] + sum((y - x) ** 2 for x, y in zip(a, b)) ** .5)
+        total = ds[-1]
+        if not total:
+            return table
+        n = len(table)
+        new_table = [table[0]]
+        for j in xrange(1, n - 1):
+            d = total * j / (n - 1)
+            i = min(bisect(ds, d), n - 1)
+            d0 = ds[i - 1]
+            seg = ds[i] - d0
+            r = (d - d0) / seg if seg else 0
+            new_table.append([x + r * (y - x)
+                              for x, y in zip(table[i - 1], table[i])])
+        new_table.append(table[-1])
+        return new_table
+
+    def __call__ (self, t):
+        if t > self.duration:
+            return None
+        x = t * self._scale
+        i = int(x)
+        table = self._table
+        if i >= len(table) - 1:
+            i = len(table) - 2
+        elif i < 0:
+            i = 0
+        r = x - i
+        a = table[i]
+        b = table[i + 1]
+        if self._scalar:
+            return a + r * (b - a)
+        else:
+            return _unflatten_nums(self._template,
+                                   iter([x + r * (y - x)
+                                         for x, y in zip(a, b)]))
+
+
+def interp_linear (*waypoints, **kwargs):
     """Linear interpolation for :meth:`Scheduler.interp`.
 
-interp_linear(*waypoints) -> f
+interp_linear(*waypoints[, bake], arc_length=False) -> f
 
 :arg waypoints: each is ``(v, t)`` to set the value to ``v`` at time ``t``.
                 ``t`` can be omitted for any but the last waypoint: the first
@@ -60,6 +177,11 @@ interp_linear(*waypoints) -> f
                 function takes another argument you don't want to vary);
                 objects may be ``None`` to always use the initial value in that
                 position.
+:arg bake: a number of samples to bake the interpolation into; if given, return
+           a :class:`BakedCurve` instead, which doesn't need to search through
+           the waypoints for every value.
+:arg arc_length: if baking, whether to reparameterise the curve for constant
+                 speed (see :class:`BakedCurve`).
 
 :return: a function for which ``f(t) = v`` for every waypoint ``(v, t)``, with
          intermediate values linearly interpolated between waypoints.
@@ -124,33 +246,55 @@ interp_linear(*waypoints) -> f
     # start the generator; get_val is its send method
     g = val_gen()
     g.next()
+    bake = kwargs.get('bake')
+    if bake is not None:
+        return BakedCurve(g.send, ts[-1], bake, kwargs.get('arc_length', False))
     return g.send
 
 
 def interp_bezier (*pts, **kwargs):
     """Interpolate along a Bézier curve.
 
-interp_bezier(*pts[, transform_t]) -> f
+interp_bezier(*pts[, transform_t][, bake], arc_length=False) -> f
 
 :arg pts: points to use in constructing the curve, each with the same nested
           sequence form as taken by
-          :func:`call_in_nest <engine.util.call_in_nest>`.
+          :func:`call_in_nest <engine.util.call_in_nest>`.  Alternatively,
+          this may be a single :class:`BakedCurve` sampled over times ``0`` to
+          ``1``, as created with ``bake``, to share it between interpolations.
 :arg transform_t: function to use to transform the time before computing the
                   curve point.
+:arg bake: a number of samples to bake the curve into, so computing points is a
+           table lookup rather than evaluating the curve.
+:arg arc_length: if baking, whether to reparameterise the curve for constant
+                 speed (see :class:`BakedCurve`).
 
-:return: the interpolation function.
+:return: the interpolation function.  If baking and ``transform_t`` is not
+         given, this is the :class:`BakedCurve`.
 
 """
     transform_t = kwargs.get('transform_t')
     if isinstance(transform_t, (int, float)):
         scale = transform_t
         transform_t = lambda t: scale * t
+    bake = kwargs.get('bake')
+    if len(pts) == 1 and isinstance(pts[0], BakedCurve):
+        curve = pts[0]
+    elif bake is not None:
+        curve = BakedCurve(lambda t: call_in_nest(bezier, t, *pts), 1, bake,
+                           kwargs.get('arc_length', False))
+    else:
+        curve = None
+    if curve is not None and transform_t is None:
+        return curve
 
     def get_val (t):
         if transform_t is not None:
             t = transform_t(t)
         if t is None or t > 1:
             return None
+        elif curve is not None:
+            return curve(t)
         else:
             return call_in_nest(bezier, t, *pts)
 
@@ -471,6 +615,264 @@ sequences).  Finishes when all interpolation functions return ``None``.
     return interp_combine(avg, *get_vals)
 
 
+def ease_bezier (*pts, **kwargs):
+    """Easing curve for :meth:`Scheduler.interp_batched` along a 1D Bézier
+curve.
+
+ease_bezier(*pts[, bake]) -> ease
+
+:arg pts: points defining the curve, as taken by
+          :func:`bezier <engine.util.bezier>`; usually starting at ``0`` and
+          ending at ``1``.
+:arg bake: a number of samples to bake the curve into (see
+           :class:`BakedCurve`); the result can be shared by any number of
+           interpolations.
+
+:return: a function taking the proportion of the interpolation's time that has
+         passed and returning the proportion of the way from the initial value
+         to the target value.
+
+"""
+    bake = kwargs.get('bake')
+    if bake is not None:
+        return BakedCurve(lambda r: bezier(r, *pts), 1, bake)
+    return lambda r: bezier(r, *pts)
+
+
+# placeholder for a number varied by a batched interpolation
+_VARIED = object()
+
+
+def _fill_varied (template, nums):
+    """Replace :data:`_VARIED` in a nested list structure with numbers from an
+iterator."""
+    if isinstance(template, list):
+        return [_fill_varied(x, nums) for x in template]
+    elif template is _VARIED:
+        return nums.next()
+    else:
+        return template
+
+
+def _round_batched (do, v):
+    # round_val for a batched interpolation with a nested value
+    return ir(v) if do and isinstance(v, (int, float)) else v
+
+
+class _InterpBatch (object):
+    """Interpolations run by :meth:`Scheduler.interp_batched`.
+
+The state of each interpolation is stored at the same index (its slot) in a
+number of flat lists, so that :meth:`Scheduler._update_batched` can advance all
+of them in a single loop.  Slots of removed interpolations are reused.
+
+"""
+
+    # lists with an element per slot, and their values for a free slot
+    _fields = (('ident', None), ('set_val', None), ('v0', 0), ('dv', 0),
+               ('template', None), ('duration', 0), ('t', 0), ('ease', None),
+               ('oscillate', False), ('t_max', None), ('bounds', None),
+               ('end', None), ('round_val', False), ('multi_arg', False),
+               ('update_frame', None), ('dt', 0), ('domain', None),
+               ('last_v', None), ('paused', False))
+
+    def __init__ (self):
+        # whether slots are being iterated over, so can't be reused
+        self.updating = False
+        self._clear()
+
+    def _clear (self):
+        for field, default in self._fields:
+            setattr(self, field, [])
+        # {ident: slot}
+        self.slots = {}
+        self._free = []
+
+    def __len__ (self):
+        return len(self.slots)
+
+    def __contains__ (self, ident):
+        return ident in self.slots
+
+    def add (self, ident, set_val, v0, target, t, ease, oscillate, t_max,
+             bounds, end, round_val, multi_arg, resolution, domain):
+        """Add an interpolation, with arguments as taken by
+:meth:`Scheduler.interp_batched`."""
+        if (isinstance(v0, (int, float)) and
+            isinstance(target, (int, float))):
+            template = None
+            dv = target - v0
+        else:
+            # nested values: vary a flat list of numbers
+            v0s = []
+            dvs = []
+
+            def vary (v, target):
+                if (isinstance(v, (int, float)) and
+                    isinstance(target, (int, float))):
+                    v0s.append(v)
+                    dvs.append(target - v)
+                    return _VARIED
+                else:
+                    return v
+
+            template = call_in_nest(vary, v0, target)
+            v0 = v0s
+            dv = dvs
+        values = (ident, set_val, v0, dv, template, t, 0, ease, oscillate,
+                  t_max, bounds, end, round_val, multi_arg,
+                  None if resolution is None else 1. / resolution, 0, domain,
+                  None, False)
+        if self._free and not self.updating:
+            slot = self._free.pop()
+            for (field, default), value in zip(self._fields, values):
+                getattr(self, field)[slot] = value
+        else:
+            slot = len(self.ident)
+            for (field, default), value in zip(self._fields, values):
+                getattr(self, field).append(value)
+        self.slots[ident] = slot
+
+    def rm (self, ident):
+        """Remove an interpolation."""
+        slot = self.slots.pop(ident)
+        if not self.slots and not self.updating:
+            # don't keep looping over empty slots
+            self._clear()
+            return
+        # drop references
+        for field, default in self._fields:
+            getattr(self, field)[slot] = default
+        self._free.append(slot)
+
+    def pause (self, ident, paused=True):
+        """Pause or unpause an interpolation."""
+        self.paused[self.slots[ident]] = paused
+
+
+class TimeDomain (object):
+    """A group of timeouts and interpolations that share a clock.
+
+Obtain instances through :meth:`Scheduler.domain`.  Timeouts, interpolations,
+:class:`Countdown` and :class:`Counter` instances and
+:class:`Animation <engine.gfx.graphics.Animation>` frames can be put in a
+domain by passing its name to the method that creates them.
+
+Pausing a domain or changing its :attr:`scale` takes effect for everything in
+it at once, at no cost per item.  Time in seconds is scaled by :attr:`scale`;
+time in frames is not, so timeouts given in frames are only affected by
+pausing.
+
+"""
+
+    def __init__ (self, name, scale=1):
+        #: The name this domain is stored under in the scheduler.
+        self.name = name
+        #: Multiplier for the speed time passes at in seconds; may be changed
+        #: freely.
+        self.scale = scale
+        #: Whether the domain is paused (time does not pass); see :meth:`pause`.
+        self.paused = False
+        # time passed in this domain, as [seconds, frames]
+        self._clock = [0, 0]
+        # due-time-ordered heaps of (due, seq, ident) for timeouts measured in
+        # seconds and in frames; entries are removed lazily, so some may be
+        # stale
+        self._timeouts = ([], [])
+
+    @property
+    def t (self):
+        """The amount of (scaled) time that has passed in this domain, in
+seconds."""
+        return self._clock[0]
+
+    def pause (self):
+        """Stop time passing in this domain.
+
+pause() -> self
+
+"""
+        self.paused = True
+        return self
+
+    def unpause (self):
+        """Continue time passing in this domain.
+
+unpause() -> self
+
+"""
+        self.paused = False
+        return self
+
+
+class Future (object):
+    """The result of something that finishes later, which a task can wait for.
+
+Future()
+
+Returned by :meth:`Scheduler.sleep`, :meth:`Scheduler.wait`,
+:meth:`Scheduler.spawn` and :meth:`Scheduler.run_in_thread`; a task (see
+:meth:`Scheduler.spawn`) waits for one by yielding it.  Futures may also be
+created and finished directly.
+
+"""
+
+    def __init__ (self):
+        #: Whether this has finished (see :meth:`finish` and :meth:`fail`).
+        self.done = False
+        #: The result passed to :meth:`finish`.
+        self.result = None
+        #: The ``sys.exc_info()`` tuple passed to :meth:`fail`, or ``None``.
+        self.exc_info = None
+        self._cbs = []
+
+    def add_cb (self, cb):
+        """Call a function when this finishes.
+
+add_cb(cb)
+
+:arg cb: a function to call with this future.  If this has already finished, it
+         is called immediately.
+
+"""
+        if self.done:
+            cb(self)
+        else:
+            self._cbs.append(cb)
+
+    def finish (self, result=None):
+        """Mark this as finished.
+
+finish(result=None)
+
+:arg result: value to store in :attr:`result`; tasks waiting on this get it as
+             the value of their ``yield`` expression.
+
+Finishing more than once does nothing.
+
+"""
+        if not self.done:
+            self.done = True
+            self.result = result
+            cbs = self._cbs
+            self._cbs = None
+            for cb in cbs:
+                cb(self)
+
+    def fail (self, exc_info):
+        """Mark this as finished with an error.
+
+fail(exc_info)
+
+:arg exc_info: a ``sys.exc_info()`` tuple for an exception to store in
+               :attr:`exc_info`; it is raised in tasks waiting on this.
+
+"""
+        if not self.done:
+            self.exc_info = exc_info
+            self.finish()
+
+
 class Timer (object):
     """Frame-based timer.
 
@@ -494,6 +896,27 @@ Timer(fps=60)
         #: ``cb`` argument to :meth:`run` and any sleeping to make up a full
         #: frame).
         self.elapsed = None
+        #: How many seconds before the end of a frame to stop sleeping and
+        #: busy-wait instead, for more precise frame timing at the cost of CPU
+        #: usage.  ``0`` disables this, and the end of each frame is only
+        #: accurate to within a millisecond or so.  Defaults to
+        #: :data:`conf.FRAME_SPIN_TIME`.
+        self.spin_time = conf.FRAME_SPIN_TIME
+        #: ``collections.deque`` of the times in seconds taken by recent frames
+        #: (as for :attr:`elapsed`), oldest first.  This holds up to
+        #: :data:`conf.FRAME_STATS_LENGTH` frames.
+        self.frame_times = deque(maxlen=conf.FRAME_STATS_LENGTH)
+        #: ``collections.deque`` of the amounts of time in seconds by which
+        #: sleeping at the end of recent frames overran (negative if it
+        #: finished early), like :attr:`frame_times`.  Frames without any
+        #: sleeping are not included.
+        self.oversleeps = deque(maxlen=conf.FRAME_STATS_LENGTH)
+        #: Whether to run with a virtual clock: every frame is taken to last
+        #: exactly :attr:`frame` seconds and the timer never sleeps, so frames
+        #: run as fast as ``cb`` allows.  Since time passed only depends on the
+        #: number of frames run, results are deterministic.  Defaults to
+        #: :data:`conf.VIRTUAL_TIME`.
+        self.virtual_time = conf.VIRTUAL_TIME
 
     @property
     def fps (self):
@@ -516,10 +939,50 @@ because of slow calls to the ``cb`` argument to :meth:`run`.
 """
         return 1 / self.current_frame_time
 
+    def frame_time_percentiles (self, *ps):
+        """Get percentiles of recent frame times.
+
+frame_time_percentiles(*ps) -> times
+
+:arg ps: any number of percentiles to compute, each from ``0`` to ``100``.
+
+:return: a list of frame times in seconds, one for each of ``ps``, taken from
+         :attr:`frame_times`; each is ``None`` if no frames have been run yet.
+
+"""
+        ts = sorted(self.frame_times)
+        n = len(ts)
+        if not n:
+            return [None] * len(ps)
+        return [ts[min(max(int(ceil(p / 100. * n)) - 1, 0), n - 1)] for p in ps]
+
+    def frame_time_histogram (self, bin_size=.001):
+        """Get a histogram of recent frame times.
+
+frame_time_histogram(bin_size=.001) -> bins
+
+:arg bin_size: the range of frame times in seconds covered by each bin.
+
+:return: ``{t: count}`` for times from :attr:`frame_times`, where a bin covers
+         frame times from ``t`` to ``t + bin_size``.  Empty bins are omitted.
+
+"""
+        bins = {}
+        for t in self.frame_times:
+            b = int(t / bin_size) * bin_size
+            bins[b] = bins.get(b, 0) + 1
+        return bins
+
+    @property
+    def oversleep (self):
+        """The mean of :attr:`oversleeps`, in seconds (``0`` if empty)."""
+        n = len(self.oversleeps)
+        return sum(self.oversleeps) / n if n else 0
+
     def run (self, cb, *args, **kwargs):
         """Run indefinitely or for a specified amount of time.
 
-run(cb, *args[, seconds][, frames]) -> remain
+run(cb, *args[, seconds][, frames][, idle]) -> remain
 
 :arg cb: a function to call every frame.
 :arg args: extra arguments to pass to cb.
@@ -527,11 +990,18 @@ run(cb, *args[, seconds][, frames]) -> remain
               changes to :attr:`fps`.
 :arg frames: the number of frames to run for; can be a float.  Ignored if
              ``seconds`` is passed.
+:arg idle: a function to call at the end of each frame with time to spare,
+           before sleeping.  It is passed the time the frame should end, as
+           returned by ``timeit.default_timer``, and should return before then.
 
 If neither ``seconds`` nor ``frames`` is given, run forever (until :meth:`stop`
 is called).  Time passed is based on the number of frames that have passed, so
 it does not necessarily reflect real time.
 
+If :attr:`virtual_time` is ``True``, no sleeping is done, and ``idle`` is only
+called if ``cb`` took less real time than :attr:`frame`, and is passed the time
+a full frame would end.
+
 :return: the number of seconds/frames left until the timer has been running for
          the requested amount of time (or ``None``, if neither were given).
          This may be less than ``0`` if ``cb`` took a long time to run.
@@ -542,6 +1012,7 @@ it does not necessarily reflect real time.
         self._stopped = False
         seconds = kwargs.get('seconds')
         frames = kwargs.get('frames')
+        idle = kwargs.get('idle')
         if seconds is not None:
             seconds = max(seconds, 0)
         elif frames is not None:
@@ -553,6 +1024,13 @@ it does not necessarily reflect real time.
             frame = self.frame
             cb(*args)
             t_gone = time() - t0
+            virtual = self.virtual_time
+            if virtual:
+                # use up any real time left in the frame, then pretend the
+                # frame took exactly as long as it should have
+                if idle is not None and t_gone < frame:
+                    idle(t0 + frame)
+                t_gone = frame
             # return if necessary
             if self._stopped:
                 if seconds is not None:
@@ -561,10 +1039,14 @@ it does not necessarily reflect real time.
                     return frames - t_gone / frame
                 else:
                     return None
-            # check how long to wait until the end of the frame by aiming for a
-            # rolling frame average equal to the target frame time
-            frame_t = (1 - r) * self.current_frame_time + r * t_gone
-            t_left = (frame - frame_t) / r
+            if virtual:
+                frame_t = frame
+                t_left = 0
+            else:
+                # check how long to wait until the end of the frame by aiming
+                # for a rolling frame average equal to the target frame time
+                frame_t = (1 - r) * self.current_frame_time + r * t_gone
+                t_left = (frame - frame_t) / r
             # reduce wait if we would go over the requested running time
             if seconds is not None:
                 t_left = min(seconds, t_left)
@@ -572,12 +1054,32 @@ it does not necessarily reflect real time.
                 t_left = min(frames * frame, t_left)
             # wait
             if t_left > 0:
-                wait(int(1000 * t_left))
+                end = t0 + t_gone + t_left
+                if idle is not None:
+                    idle(end)
+                remain = end - time()
+                spin = self.spin_time
+                if spin > 0:
+                    # sleep for whole milliseconds, then busy-wait until the
+                    # end of the frame, and count time actually spent
+                    ms = int(1000 * (remain - spin))
+                    if ms > 0:
+                        wait(ms)
+                    now = time()
+                    while now < end:
+                        now = time()
+                    t_left = now - t0 - t_gone
+                else:
+                    if remain > 0:
+                        wait(int(1000 * remain))
+                    now = time()
+                self.oversleeps.append(now - end)
                 t_gone += t_left
                 frame_t += r * t_left
             # update some attributes
-            t0 += t_gone
+            t0 = time() if virtual else t0 + t_gone
             self.elapsed = t_gone
+            self.frame_times.append(t_gone)
             self.current_frame_time = frame_t
             self.t += t_gone
             # return if necessary
@@ -606,10 +1108,36 @@ Scheduler(fps=60)
 
     def __init__ (self, fps=60):
         Timer.__init__(self, fps)
+        # {ident: [due, in_frames, repeat_seconds, repeat_frames, paused_remain,
+        #          cb, seq, domain]}, where seq identifies the live entry in
+        # the domain's queue, or is None if there is none
         self._cbs = {}
         self._max_id = 0
+        # {name: domain}
+        self._domains = {None: TimeDomain(None)}
+        self._seq = 0
+        self._n_stale = 0
         self._interps = {}
         self._interp_timers = {}
+        # all advanced together each frame, by _update rather than a timeout so
+        # that pausing a domain only affects interpolations in that domain
+        self._batched = _InterpBatch()
+        # futures to finish at the start of the next frame
+        self._next_frame = []
+        # {ident: [step, is_iter, avg_time]}
+        self._idle_tasks = {}
+        # heap of (-priority, ident)
+        self._idle_queue = []
+        # {ident: [Future]}, finished when the timeout is removed
+        self._waiters = {}
+        # (future, result, exc_info) for jobs finished in other threads
+        self._done_jobs = deque()
+        # {ident: label} for timeouts given a label
+        self._labels = {}
+        #: :class:`instrument.Profiler <engine.instrument.Profiler>` instance
+        #: to record time spent in timeouts with, or ``None``.  Times are only
+        #: recorded while it is enabled.
+        self.profiler = None
 
     def run (self, seconds = None, frames = None):
         """Start the scheduler.
@@ -620,14 +1148,99 @@ Arguments and return value are as for :meth:`Timer.run`.
 
 """
         return Timer.run(self, self._update, seconds = seconds,
-                         frames = frames)
+                         frames = frames, idle = self._run_idle)
+
+    def add_idle (self, task, priority=0):
+        """Do some work using time left over at the end of frames.
+
+add_idle(task, priority=0) -> ident
+
+:arg task: a function to call with no arguments, or an iterator (such as a
+           generator) to advance.  A function can return a boolean true object
+           to be called again later; an iterator is advanced one step at a time
+           until it is exhausted, so long tasks can be split up with ``yield``.
+:arg priority: tasks with higher priority are run first, and tasks with equal
+               priority in the order they were added.
+
+:return: an identifier to pass to :meth:`rm_idle`.
+
+Tasks run after each frame's update, in the time that would otherwise be spent
+sleeping until the next frame.  A step is only run if its previous steps have
+fit in the time remaining, so a task whose steps take longer than the spare time
+in a frame waits until a frame with enough time---keep steps short.
+
+"""
+        ident = self._max_id
+        self._max_id += 1
+        is_iter = hasattr(task, 'next')
+        self._idle_tasks[ident] = [task.next if is_iter else task, is_iter, 0]
+        heappush(self._idle_queue, (-priority, ident))
+        return ident
+
+    def rm_idle (self, *ids):
+        """Remove the idle tasks with the given identifiers.
+
+Missing IDs are ignored.
+
+"""
+        tasks = self._idle_tasks
+        for i in ids:
+            if i in tasks:
+                # leave the queue entry to be skipped later
+                del tasks[i]
+
+    def _run_idle (self, end):
+        """Run idle tasks until the given time."""
+        r = conf.FPS_AVERAGE_RATIO
+        tasks = self._idle_tasks
+        queue = self._idle_queue
+        while queue:
+            i = queue[0][1]
+            if i not in tasks:
+                heappop(queue)
+                continue
+            data = tasks[i]
+            start = time()
+            # stop if the next step would likely take us past the end
+            if start + data[2] > end:
+                break
+            try:
+                again = data[0]()
+            except StopIteration:
+                again = False
+            else:
+                again = data[1] or again
+            data[2] = (1 - r) * data[2] + r * (time() - start)
+            if not again and tasks.get(i) is data:
+                del tasks[i]
+
+    def domain (self, name=None):
+        """Get a time domain by name, creating it if necessary.
+
+domain(name=None) -> time_domain
+
+:arg name: any hashable name for the domain.  ``None`` is the default domain,
+           used when no domain is specified.
+
+:return: the :class:`TimeDomain` instance.
+
+"""
+        domains = self._domains
+        if name not in domains:
+            domains[name] = TimeDomain(name)
+        return domains[name]
+
+    @property
+    def domains (self):
+        """A list of the names of existing time domains."""
+        return self._domains.keys()
 
     def add_timeout (self, cb, seconds=None, frames=None, repeat_seconds=None,
-                     repeat_frames=None):
+                     repeat_frames=None, domain=None, label=None):
         """Call a function after a delay.
 
-add_timeout(cb[, seconds][, frames][, repeat_seconds][, repeat_frames])
-            -> ident
+add_timeout(cb[, seconds][, frames][, repeat_seconds][, repeat_frames]
+            [, domain][, label]) -> ident
 
 :arg cb: the function to call.
 :arg seconds: how long to wait before calling, in seconds (respects changes to
@@ -640,6 +1253,10 @@ add_timeout(cb[, seconds][, frames][, repeat_seconds][, repeat_frames])
                      initial time delay is used between calls.
 :arg repeat_frames: how long to wait between calls, in frames (like
                     ``repeat_seconds``).
+:arg domain: the name of the :class:`TimeDomain` to measure time in (see
+             :meth:`domain`).
+:arg label: a name to record time spent in ``cb`` under when profiling (see
+            :attr:`profiler`); defaults to the name of ``cb``.
 
 :return: a timeout identifier to pass to :meth:`rm_timeout`.  This is
          guaranteed to be unique over time.
@@ -650,6 +1267,10 @@ between calls is actually an average over a large enough number of frames.
 ``cb`` can return a boolean true object to repeat the timeout; otherwise it
 will not be called again.
 
+Timeouts are kept ordered by the time they are due, so pending timeouts cost
+nothing per frame until they are called.  Timeouts due in the same frame are
+called in the order they were added.
+
 """
         if seconds is not None:
             frames = None
@@ -660,11 +1281,44 @@ will not be called again.
         elif repeat_frames is None:
             repeat_seconds = seconds
             repeat_frames = frames
-        self._cbs[self._max_id] = [seconds, frames, repeat_seconds,
-                                   repeat_frames, True, cb]
+        ident = self._max_id
         self._max_id += 1
+        in_frames = seconds is None
+        d = self.domain(domain)
+        data = [None, in_frames, repeat_seconds, repeat_frames, None, cb,
+                None, d]
+        self._cbs[ident] = data
+        if label is not None:
+            self._labels[ident] = label
+        self._queue_timeout(ident, data, d._clock[in_frames] +
+                                         (frames if in_frames else seconds))
         # ID is key in self._cbs
-        return self._max_id - 1
+        return ident
+
+    def _queue_timeout (self, ident, data, due):
+        """Add a timeout to the queue, to be called at the given time."""
+        self._seq += 1
+        data[0] = due
+        data[6] = self._seq
+        heappush(data[7]._timeouts[data[1]], (due, self._seq, ident))
+
+    def _unqueue_timeout (self, data):
+        """Invalidate a timeout's entry in the queue, if any."""
+        if data[6] is not None:
+            data[6] = None
+            self._n_stale += 1
+            if self._n_stale > 64 and self._n_stale > len(self._cbs):
+                self._compact_timeouts()
+
+    def _compact_timeouts (self):
+        """Remove stale entries from the queue."""
+        cbs = self._cbs
+        for d in self._domains.itervalues():
+            for heap in d._timeouts:
+                heap[:] = [entry for entry in heap
+                           if entry[2] in cbs and cbs[entry[2]][6] == entry[1]]
+                heapify(heap)
+        self._n_stale = 0
 
     def rm_timeout (self, *ids):
         """Remove the timeouts with the given identifiers.
@@ -673,63 +1327,255 @@ Missing IDs are ignored.
 
 """
         cbs = self._cbs
+        batched = self._batched
         interps = self._interps
         interp_timers = self._interp_timers
         for i in ids:
             if i in cbs:
-                del cbs[i]
-                if i in interps:
-                    interp_timers[interps[i]].remove(i)
-                    del interps[i]
+                self._unqueue_timeout(cbs.pop(i))
+            elif i in batched:
+                batched.rm(i)
+            else:
+                continue
+            if i in interps:
+                interp_timers[interps[i]].remove(i)
+                del interps[i]
+            if i in self._labels:
+                del self._labels[i]
+            if i in self._waiters:
+                for f in self._waiters.pop(i):
+                    f.finish()
 
     def pause_timeout (self, *ids):
         """Pause the timeouts with the given identifiers."""
         cbs = self._cbs
+        batched = self._batched
         for i in ids:
             if i in cbs:
-                cbs[i][4] = False
+                data = cbs[i]
+                if data[4] is None:
+                    data[4] = data[0] - data[7]._clock[data[1]]
+                    self._unqueue_timeout(data)
+            elif i in batched:
+                batched.pause(i)
 
     def unpause_timeout (self, *ids):
         """Continue the paused timeouts with the given identifiers."""
         cbs = self._cbs
+        batched = self._batched
         for i in ids:
-            if i in cbs:
-                cbs[i][4] = True
+            if i in batched:
+                batched.pause(i, False)
+            elif i in cbs:
+                data = cbs[i]
+                if data[4] is not None:
+                    remain = data[4]
+                    data[4] = None
+                    self._queue_timeout(i, data,
+                                        data[7]._clock[data[1]] + remain)
+
+    def _repeat_timeout (self, ident, data):
+        """Requeue a timeout after its callback asked to be repeated."""
+        clock = data[7]._clock
+        in_frames = data[2] is None
+        delay = data[3] if in_frames else data[2]
+        if in_frames == data[1]:
+            # carry over part-frames
+            due = data[0] + delay
+        else:
+            due = clock[in_frames] + delay
+        data[1] = in_frames
+        if data[4] is not None:
+            # paused during the callback
+            data[0] = due
+            data[4] = due - clock[in_frames]
+        elif data[6] is None:
+            self._queue_timeout(ident, data, due)
+        # else unpaused during the callback, so already queued
 
     def _update (self):
         """Handle callbacks this frame."""
+        jobs = self._done_jobs
+        while jobs:
+            f, result, exc_info = jobs.popleft()
+            if exc_info is None:
+                f.finish(result)
+            else:
+                f.fail(exc_info)
+        waiting = self._next_frame
+        if waiting:
+            self._next_frame = []
+            for f in waiting:
+                f.finish()
         cbs = self._cbs
         frame = self.frame
-        # cbs might add/remove cbs, so use items instead of iteritems
-        for i, data in cbs.items():
-            if i not in cbs:
-                # removed since we called .items()
+        # gather due timeouts before calling any, so that timeouts added by
+        # callbacks aren't called until the next frame
+        due = []
+        for d in self._domains.values():
+            if d.paused:
+                continue
+            clock = d._clock
+            clock[0] += frame * d.scale
+            clock[1] += 1
+            for in_frames, heap in enumerate(d._timeouts):
+                t = clock[in_frames]
+                while heap and heap[0][0] <= t:
+                    entry = heappop(heap)
+                    i = entry[2]
+                    if i in cbs and cbs[i][6] == entry[1]:
+                        due.append((i, entry[1]))
+                    else:
+                        self._n_stale -= 1
+        due.sort()
+        if self._batched:
+            self._update_batched()
+        prof = self.profiler
+        if prof is not None and not prof.enabled:
+            prof = None
+        for i, seq in due:
+            data = cbs.get(i)
+            if data is None or data[6] != seq:
+                # removed or paused since we gathered timeouts
                 continue
-            if data[0] is not None:
-                remain = 0
-                dt = frame
+            # no longer in the queue
+            data[6] = None
+            # call callback
+            if prof is None:
+                again = data[5]()
+            else:
+                label = self._label(i)
+                start = time()
+                again = data[5]()
+                prof.record('timeout', label, time() - start)
+            if again:
+                if cbs.get(i) is data:
+                    self._repeat_timeout(i, data)
+            elif cbs.get(i) is data: # else removed in above call
+                self.rm_timeout(i)
+
+    def sleep (self, seconds=None, frames=None, domain=None):
+        """Get a :class:`Future` that finishes after a delay.
+
+sleep([seconds][, frames][, domain]) -> future
+
+Arguments are as taken by :meth:`add_timeout`.  In a task (see :meth:`spawn`),
+use as ``yield scheduler.sleep(seconds)``.
+
+"""
+        f = Future()
+        self.add_timeout(f.finish, seconds, frames, domain=domain)
+        return f
+
+    def wait (self, ident):
+        """Get a :class:`Future` that finishes when a timeout ends.
+
+wait(ident) -> future
+
+:arg ident: a timeout identifier, as returned by :meth:`add_timeout`,
+            :meth:`interp` and similar methods.
+
+The future finishes when the timeout is removed, whether because it finished, or
+because :meth:`rm_timeout` was called or it was overridden by another
+interpolation.  If there is no such timeout, it has already finished.  In a
+task, wait for an interpolation as
+``yield scheduler.wait(scheduler.interp(...))``.
+
+"""
+        f = Future()
+        if ident in self._cbs or ident in self._batched:
+            self._waiters.setdefault(ident, []).append(f)
+        else:
+            f.finish()
+        return f
+
+    def spawn (self, task):
+        """Run a task that can wait for things without blocking frames.
+
+spawn(task) -> future
+
+:arg task: a generator (or other object with ``next``, ``send`` and ``throw``
+           methods).  It should yield :class:`Future` instances, and is resumed
+           when each finishes, with the future's :attr:`result <Future.result>`
+           as the value of the ``yield`` expression, or with its exception
+           raised.  Yielding ``None`` waits until the next frame, even if
+           time domains are paused.
+
+:return: a :class:`Future` that finishes when the task does.
+
+The task runs up to its first ``yield`` immediately.  Exceptions the task
+doesn't catch propagate out of whatever resumed it (usually the scheduler's
+frame callback).
+
+"""
+        done = Future()
+
+        def step (waited):
+            while True:
+                if waited is None:
+                    resume = task.next
+                elif waited.exc_info is not None:
+                    resume = partial(task.throw, *waited.exc_info)
+                else:
+                    resume = partial(task.send, waited.result)
+                try:
+                    waited = resume()
+                except StopIteration:
+                    done.finish()
+                    return
+                if waited is None:
+                    waited = Future()
+                    self._next_frame.append(waited)
+                elif not isinstance(waited, Future):
+                    raise TypeError('tasks should yield Future instances, ' \
+                                    'not {0}'.format(type(waited).__name__))
+                if not waited.done:
+                    waited.add_cb(step)
+                    return
+                # else finished already: continue straight away
+
+        step(None)
+        return done
+
+    def run_in_thread (self, fn, *args, **kwargs):
+        """Call a function in another thread.
+
+run_in_thread(fn, *args, **kwargs) -> future
+
+:arg fn: the function to call, with ``args`` and ``kwargs``.
+
+:return: a :class:`Future` that finishes with the return value of ``fn``, or
+         fails with the exception it raised.
+
+This is for blocking work, such as reading files: it runs while frames are
+sleeping instead of adding to frame time.  The future is always finished in
+this thread, at the start of the first frame after ``fn`` returns, so tasks
+waiting on it can safely use the engine.  ``fn`` itself should not.
+
+"""
+        f = Future()
+
+        def run ():
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                self._done_jobs.append((f, None, sys.exc_info()))
             else:
-                remain = 1
-                dt = 1
-            if data[4]:
-                data[remain] -= dt
-                if data[remain] <= 0:
-                    # call callback
-                    if data[5]():
-                        # add on delay
-                        total = data[2] is None
-                        data[total] += data[total + 2]
-                    elif i in cbs: # else removed in above call
-                        self.rm_timeout(i)
-            # else paused
+                self._done_jobs.append((f, result, None))
+
+        thread = Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        return f
 
     def interp (self, get_val, set_val, t_max=None, bounds=None, end=None,
                 round_val=False, multi_arg=False, resolution=None,
-                override=True):
+                override=True, domain=None, label=None):
         """Vary a value over time.
 
 interp(get_val, set_val[, t_max][, bounds][, end], round_val=False,
-       multi_arg=False[, resolution], override=True) -> timeout_id
+       multi_arg=False[, resolution], override=True[, domain][, label])
+    -> timeout_id
 
 :arg get_val: a function called with the elapsed time in seconds to obtain the
               current value.  If this function returns ``None``, the
@@ -769,27 +1615,23 @@ interp(get_val, set_val[, t_max][, bounds][, end], round_val=False,
                ``(obj, attr)`` for the identical objects and the exact same
                sets of attributes (since ``attr`` can be a sequence).  The
                ``end`` action for aborted interpolations is not called.
+:arg domain: the name of the :class:`TimeDomain` to measure time in (see
+             :meth:`domain`).
+:arg label: a name to record time spent under when profiling (see
+            :attr:`profiler`); defaults to a description of ``set_val``.
 
 :return: an identifier that can be passed to :meth:`rm_timeout` to remove the
         callback that continues the interpolation.  In this case ``end`` is not
         respected.
 
 """
+        # a baked curve stops at the end of its duration
+        curve_end = (get_val.duration if isinstance(get_val, BakedCurve)
+                     else None)
         if round_val:
             get_val = interp_round(get_val, round_val)
-        if callable(set_val):
-            key = set_val
-        else:
-            obj, attr = set_val
-            if isinstance(attr, basestring):
-                key = (obj, attr)
-                set_val = lambda val: setattr(obj, attr, val)
-            else:
-                # attr is a sequence of attributes
-                key = (obj, frozenset(attr))
-                def set_val (vals):
-                    for a, val in zip(attr, vals):
-                        setattr(obj, a, val)
+        key, set_val = self._parse_set_val(set_val)
+        d = self.domain(domain)
 
         def timeout_cb ():
             if resolution is not None:
@@ -798,15 +1640,21 @@ interp(get_val, set_val[, t_max][, bounds][, end], round_val=False,
             dt = 0
             last_v = None
             done = False
+            t_end = curve_end
             while True:
                 frame = self.frame
-                t += frame
+                t += frame * d.scale
                 dt += frame
                 if resolution is None or dt >= update_frame:
                     if resolution is not None:
                         dt -= update_frame
                     # perform an update
                     v = get_val(t)
+                    if v is None and t_end is not None:
+                        # past the end of a baked curve: set its final value,
+                        # like the interp_* functions do, then stop next time
+                        v = get_val(t_end)
+                        t_end = None
                     if v is None:
                         done = True
                     # check bounds
@@ -838,8 +1686,47 @@ interp(get_val, set_val[, t_max][, bounds][, end], round_val=False,
                 else:
                     yield True
 
-        timeout_id = self.add_timeout(timeout_cb().next, frames=1)
+        timeout_id = self.add_timeout(timeout_cb().next, frames=1,
+                                      domain=domain, label=label)
+        self._register_interp(key, timeout_id, override)
+        return timeout_id
 
+    def _parse_set_val (self, set_val):
+        """Get the override key and setter function for a ``set_val`` argument
+to :meth:`interp`."""
+        if callable(set_val):
+            key = set_val
+        else:
+            obj, attr = set_val
+            if isinstance(attr, basestring):
+                key = (obj, attr)
+                set_val = lambda val: setattr(obj, attr, val)
+            else:
+                # attr is a sequence of attributes
+                key = (obj, frozenset(attr))
+                def set_val (vals):
+                    for a, val in zip(attr, vals):
+                        setattr(obj, a, val)
+        return (key, set_val)
+
+    def _label (self, ident):
+        """Get the label to profile a timeout or interpolation under."""
+        label = self._labels.get(ident)
+        if label is not None:
+            return label
+        key = self._interps.get(ident)
+        if key is None:
+            return cb_label(self._cbs[ident][5])
+        elif callable(key):
+            return cb_label(key)
+        else:
+            obj, attr = key
+            if not isinstance(attr, basestring):
+                attr = ','.join(sorted(attr))
+            return '{0}.{1}'.format(obj.__class__.__name__, attr)
+
+    def _register_interp (self, key, timeout_id, override):
+        """Store an interpolation's timeout under its ``set_val`` key."""
         if override and key in self._interp_timers:
             self.rm_timeout(*self._interp_timers[key])
             assert (key not in self._interp_timers,
@@ -847,17 +1734,180 @@ interp(get_val, set_val[, t_max][, bounds][, end], round_val=False,
         self._interp_timers.setdefault(key, []).append(timeout_id)
         self._interps[timeout_id] = key
 
+    def interp_batched (self, set_val, v0, target, t, ease=None,
+                        oscillate=False, t_max=None, bounds=None, end=None,
+                        round_val=False, multi_arg=False, resolution=None,
+                        override=True, domain=None, label=None):
+        """Vary a value from an initial value to a target value over time, in
+a batch with other such interpolations.
+
+interp_batched(set_val, v0, target, t[, ease], oscillate=False[, t_max]
+               [, bounds][, end], round_val=False, multi_arg=False
+               [, resolution], override=True[, domain][, label])
+    -> timeout_id
+
+:arg set_val: as taken by :meth:`interp`.
+:arg v0: the initial value, a structure of numbers as taken by
+         :func:`call_in_nest <engine.util.call_in_nest>`.  Elements which are
+         not numbers are not varied.
+:arg target: the target value, in the same form as ``v0``.  Elements may be
+             ``None`` to always use the initial value in that position.
+:arg t: the amount of time to take to reach ``target``, in seconds.
+:arg ease: a function that takes the proportion of ``t`` that has passed (from
+           ``0`` to ``1``) and returns the proportion of the way from ``v0`` to
+           ``target`` the value should be, to vary the value non-linearly (see
+           :func:`ease_bezier`).  Functions are shared by all interpolations
+           using them.
+:arg oscillate: if ``True``, move back towards ``v0`` after reaching
+                ``target``, and repeat forever.
+
+Other arguments are as taken by :meth:`interp`.  The interpolation ends as soon
+as ``target`` is reached.
+
+Unlike :meth:`interp`, interpolations created with this method do not each get
+a timeout or any functions: their start values, changes, durations and elapsed
+times are stored in flat lists, and the scheduler advances all of them in one
+loop each frame, which is much cheaper for large numbers of interpolations.
+Each still follows its own domain: pausing a domain only stops the
+interpolations in it.  The returned
+identifier may still be passed to
+:meth:`rm_timeout`, :meth:`pause_timeout` and :meth:`unpause_timeout`, and
+``override`` also applies to interpolations created through :meth:`interp`,
+and vice versa.
+
+"""
+        key, set_val = self._parse_set_val(set_val)
+        timeout_id = self._max_id
+        self._max_id += 1
+        self._batched.add(timeout_id, set_val, v0, target, t, ease, oscillate,
+                          t_max, bounds, end, round_val, multi_arg,
+                          resolution, self.domain(domain))
+        if label is not None:
+            self._labels[timeout_id] = label
+        self._register_interp(key, timeout_id, override)
         return timeout_id
 
+    def _update_batched (self):
+        """Update all batched interpolations, called every frame."""
+        frame = self.frame
+        batch = self._batched
+        prof = self.profiler
+        if prof is not None and not prof.enabled:
+            prof = None
+        idents = batch.ident
+        set_vals = batch.set_val
+        v0s = batch.v0
+        dvs = batch.dv
+        templates = batch.template
+        durations = batch.duration
+        ts = batch.t
+        eases = batch.ease
+        oscillates = batch.oscillate
+        t_maxs = batch.t_max
+        bounds_fns = batch.bounds
+        round_vals = batch.round_val
+        multi_args = batch.multi_arg
+        update_frames = batch.update_frame
+        dts = batch.dt
+        domains = batch.domain
+        last_vs = batch.last_v
+        paused = batch.paused
+        done = []
+        # setters might add interpolations, which start next frame, or remove
+        # them, which empties their slots
+        batch.updating = True
+        try:
+            for k in xrange(len(idents)):
+                i = idents[k]
+                if i is None or paused[k]:
+                    continue
+                d = domains[k]
+                if d.paused:
+                    continue
+                t = ts[k] + frame * d.scale
+                ts[k] = t
+                update_frame = update_frames[k]
+                if update_frame is not None:
+                    dt = dts[k] + frame
+                    if dt < update_frame:
+                        dts[k] = dt
+                        continue
+                    dts[k] = dt - update_frame
+                t_max = t_maxs[k]
+                if t_max is not None and t > t_max:
+                    done.append(i)
+                    continue
+                if prof is not None:
+                    start = time()
+                duration = durations[k]
+                finished = False
+                if oscillates[k]:
+                    r = (t / duration) % 2 if duration else 0
+                    if r > 1:
+                        r = 2 - r
+                elif t >= duration:
+                    r = 1
+                    finished = True
+                else:
+                    r = t / duration
+                ease = eases[k]
+                if ease is not None:
+                    r = ease(r)
+                template = templates[k]
+                if template is None:
+                    v = v0s[k] + r * dvs[k]
+                    if round_vals[k]:
+                        v = ir(v)
+                else:
+                    v = _fill_varied(template, iter([
+                        v0 + r * dv for v0, dv in izip(v0s[k], dvs[k])
+                    ]))
+                    if round_vals[k]:
+                        v = call_in_nest(_round_batched, round_vals[k], v)
+                bounds = bounds_fns[k]
+                if bounds is not None:
+                    bdy = bounds(v)
+                    if bdy is not None:
+                        finished = True
+                        v = bdy
+                if v != last_vs[k]:
+                    last_vs[k] = v
+                    set_vals[k](*v) if multi_args[k] else set_vals[k](v)
+                if finished:
+                    done.append(i)
+                if prof is not None:
+                    prof.record('interp', self._label(i), time() - start)
+        finally:
+            batch.updating = False
+        for i in done:
+            self._end_batched(i)
+
+    def _end_batched (self, ident):
+        """Finish a batched interpolation, as :meth:`interp` does."""
+        batch = self._batched
+        if ident not in batch: # removed by another interpolation
+            return
+        slot = batch.slots[ident]
+        set_val = batch.set_val[slot]
+        multi_arg = batch.multi_arg[slot]
+        last_v = batch.last_v[slot]
+        end = batch.end[slot]
+        v = end() if callable(end) else end
+        # set final value if want to
+        if v is not None and v != last_v:
+            set_val(*v) if multi_arg else set_val(v)
+        self.rm_timeout(ident)
+
     def interp_simple (self, obj, attr, target, t, end_cb=None,
-                       round_val=False, override=True):
+                       round_val=False, override=True, batched=False,
+                       domain=None):
         """A simple version of :meth:`interp`.
 
 Varies an object's attribute linearly from its current value to a target value
 in a set amount of time.
 
-interp_simple(obj, attr, target, t[, end_cb], round_val=False, override=True)
-    -> timeout_id
+interp_simple(obj, attr, target, t[, end_cb], round_val=False, override=True,
+              batched=False[, domain]) -> timeout_id
 
 :arg obj: vary an attribute of this object.
 :arg attr: the attribute name of ``obj`` to vary, or a sequence of attributes
@@ -873,15 +1923,25 @@ interp_simple(obj, attr, target, t[, end_cb], round_val=False, override=True)
                same ``obj`` and ``attr``.  This works for the exact same sets
                of attributes (since ``attr`` can be a sequence).  ``end_cb``
                is not called for aborted interpolations.
+:arg batched: whether to use :meth:`interp_batched`, which is cheaper when
+              running many interpolations at once.
+:arg domain: the name of the :class:`TimeDomain` to measure time in (see
+             :meth:`domain`).
 
 :return: an identifier that can be passed to :meth:`rm_timeout` to remove the
         callback that continues the interpolation.  In this case ``end_cb`` is
         not called.
 
 """
+        if batched:
+            return self.interp_batched((obj, attr), getattr(obj, attr),
+                                       target, t, end=end_cb,
+                                       round_val=round_val, override=override,
+                                       domain=domain)
         get_val = interp_linear(getattr(obj, attr), (target, t))
         return self.interp(get_val, (obj, attr), end=end_cb,
-                           round_val=round_val, override=override)
+                           round_val=round_val, override=override,
+                           domain=domain)
 
     def _interp_locked (self, interp_fn, *args, **kwargs):
         # HACK: Python 2 closures are immutable
@@ -927,39 +1987,41 @@ passed to this function.  Typical usage is as follows::
         """Like :meth:`interp_locked`, but wraps :meth:`interp_simple`."""
         return self._interp_locked(self.interp_simple, *args, **kwargs)
 
-    def countdown (self, t, autoreset=False):
+    def countdown (self, t, autoreset=False, domain=None):
         """Create and return a :class:`Countdown` that uses this instance for
 timing.
 
-countdown(t, autoreset=False) -> new_countdown
+countdown(t, autoreset=False[, domain]) -> new_countdown
 
 Arguments are as taken by :class:`Countdown`.
 
 """
-        return Countdown(self, t, autoreset)
+        return Countdown(self, t, autoreset, domain)
 
-    def counter (self, limit=None):
+    def counter (self, limit=None, domain=None):
         """Create and return a :class:`Counter` that uses this instance for
 timing.
 
-counter([limit]) -> new_counter
+counter([limit][, domain]) -> new_counter
 
 Arguments are as taken by :class:`Counter`.
 
 """
-        return Counter(self, limit)
+        return Counter(self, limit, domain)
 
 
 class Countdown (CbManager):
     """A simple way of counting down to an event.
 
-Countdown(scheduler, t, autoreset=False)
+Countdown(scheduler, t, autoreset=False[, domain])
 
 :arg scheduler: :class:`Scheduler` instance to use for timing.
 :arg t: how long a countdown lasts, in seconds.
 :arg autoreset: whether to reset and count down from the beginning again when
                 the countdown ends.  This is only useful with :attr:`cbs` (the
                 finished state never becomes ``True``).
+:arg domain: the name of the :class:`TimeDomain` in ``scheduler`` to measure
+             time in.
 
 An instance is boolean ``True`` if the countdown has finished, else ``False``.
 The initial state is finished---use :meth:`reset` to start the countdown.
@@ -971,12 +2033,14 @@ See also :meth:`Scheduler.countdown`.
 
 """
 
-    def __init__ (self, scheduler, t, autoreset=False):
+    def __init__ (self, scheduler, t, autoreset=False, domain=None):
         CbManager.__init__(self)
         self._scheduler = scheduler
         self._t = t
         #: As passed to the constructor.
         self.autoreset = autoreset
+        #: As passed to the constructor.
+        self.domain = domain
         self._timer_id = None
         self._finished = True
 
@@ -1017,7 +2081,8 @@ Starts counting down even if the countdown wasn't already running.
         if self._timer_id is not None:
             self._scheduler.rm_timeout(self._timer_id)
         self._finished = False
-        self._timer_id = self._scheduler.add_timeout(self._end_cb, self.t)
+        self._timer_id = self._scheduler.add_timeout(self._end_cb, self.t,
+                                                     domain=self.domain)
         return self
 
     def cancel (self):
@@ -1066,10 +2131,12 @@ unpause() -> self
 class Counter (CbManager):
     """A simple way of keeping track of time.
 
-Counter(scheduler[, limit])
+Counter(scheduler[, limit][, domain])
 
 :arg scheduler: :class:`Scheduler` instance to use for timing.
 :arg limit: if given, stop the counter once it reaches this many seconds.
+:arg domain: the name of the :class:`TimeDomain` in ``scheduler`` to measure
+             time in.
 
 An instance is boolean ``True`` if the counter has reached ``limit``, else
 ``False``.  The initial state is finished---use :meth:`reset` to start the
@@ -1078,34 +2145,107 @@ counter.
 This is a :class:`CbManager <engine.util.cb.CbManager>`; callbacks added are
 called when the counter reacher :attr:`limit`, and take no arguments.
 
+The count is worked out from the scheduler's time when it is requested, so a
+running counter costs nothing per frame.
+
 See also :meth:`Scheduler.counter`.
 
 """
 
-    def __init__ (self, scheduler, limit=None):
+    def __init__ (self, scheduler, limit=None, domain=None):
         CbManager.__init__(self)
         self._scheduler = scheduler
-        #: How far the counter has counted, in seconds.
-        self.t = 0
-        #: As passed to the constructor, or ``None``.
-        self.limit = limit
+        self._domain = domain
+        # the count is _t, plus scheduler time passed since _start if running
+        # and not paused (else _start is None)
+        self._t = 0
+        self._start = None
+        self._limit = limit
+        self._running = False
         self._timer_id = None
         self._finished = True
 
     def __nonzero__ (self):
         return self._finished
 
-    def _update (self):
-        # called every frame
-        self.t += self._scheduler.frame
+    def _now (self):
+        # the current time in the counter's domain
+        return self._scheduler.domain(self._domain).t
 
-        if self.limit is not None and self.t >= self.limit:
-            self.t = self.limit
-            self._finished = True
-            self.call()
-            return False
-        else:
-            return True
+    @property
+    def domain (self):
+        """As passed to the constructor.  Set as necessary."""
+        return self._domain
+
+    @domain.setter
+    def domain (self, domain):
+        self._t = self.t
+        self._domain = domain
+        if self._start is not None:
+            self._start = self._now()
+            self._queue_limit()
+
+    @property
+    def t (self):
+        """How far the counter has counted, in seconds.
+
+Setting this continues counting from the new value.
+
+"""
+        t = self._t
+        if self._start is not None:
+            t += self._now() - self._start
+            if self._limit is not None:
+                t = min(t, self._limit)
+        return t
+
+    @t.setter
+    def t (self, t):
+        self._t = t
+        if self._start is not None:
+            self._start = self._now()
+            self._queue_limit()
+
+    @property
+    def limit (self):
+        """As passed to the constructor, or ``None``.  Set as necessary."""
+        return self._limit
+
+    @limit.setter
+    def limit (self, limit):
+        self._limit = limit
+        if self._start is not None:
+            self._queue_limit()
+
+    def _queue_limit (self):
+        # (re)schedule the timeout for reaching the limit, counting from now
+        s = self._scheduler
+        self._t = self.t
+        self._start = self._now()
+        if self._timer_id is not None:
+            s.rm_timeout(self._timer_id)
+            self._timer_id = None
+        if self._limit is not None:
+            remain = self._limit - self._t
+            self._timer_id = s.add_timeout(self._end_cb, max(remain, 0),
+                                           domain=self._domain)
+
+    def _end_cb (self):
+        # called when the limit is reached
+        self._t = self._limit
+        self._start = self._timer_id = None
+        self._running = False
+        self._finished = True
+        self.call()
+        return False
+
+    def _stop (self):
+        # stop counting, keeping the current count
+        self._t = self.t
+        self._start = None
+        if self._timer_id is not None:
+            self._scheduler.rm_timeout(self._timer_id)
+            self._timer_id = None
 
     def reset (self):
         """Start counting from ``0`` again.
@@ -1115,11 +2255,12 @@ reset() -> self
 Starts counting even if the counter wasn't already running.
 
 """
-        if self._timer_id is not None:
-            self._scheduler.rm_timeout(self._timer_id)
-        self.t = 0
+        self._stop()
+        self._t = 0
+        self._start = self._now()
+        self._running = True
         self._finished = False
-        self._timer_id = self._scheduler.add_timeout(self._update, frames=1)
+        self._queue_limit()
         return self
 
     def cancel (self):
@@ -1130,9 +2271,9 @@ cancel() -> self
 :attr:`t` is not changed.
 
 """
-        if self._timer_id is not None:
-            self._scheduler.rm_timeout(self._timer_id)
-            self._timer_id = None
+        if self._running:
+            self._stop()
+            self._running = False
             self._finished = False
         return self
 
@@ -1152,8 +2293,8 @@ finish() -> self
 pause() -> self
 
 """
-        if self._timer_id is not None:
-            self._scheduler.pause_timeout(self._timer_id)
+        if self._start is not None:
+            self._stop()
         return self
 
     def unpause (self):
@@ -1162,6 +2303,7 @@ pause() -> self
 unpause() -> self
 
 """
-        if self._timer_id is not None:
-            self._scheduler.unpause_timeout(self._timer_id)
+        if self._running and self._start is None:
+            self._start = self._now()
+            self._queue_limit()
         return self
@@ -2,7 +2,7 @@
 """A number of utility functions."""
 
 from random import random, randrange
-from collections import defaultdict
+from collections import defaultdict, deque
 from bisect import bisect
 
 import pygame as pg
@@ -14,7 +14,7 @@ from . import cb, grid
 __all__ = ('dd', 'ir', 'sum_pos', 'pos_in_rect', 'normalise_colour',
            'call_in_nest', 'bezier', 'OwnError', 'Owned', 'randsgn', 'rand0',
            'weighted_rand', 'align_rect', 'position_sfc', 'convert_sfc',
-           'combine_drawn', 'blank_sfc')
+           'combine_drawn', 'coalesce_rects', 'blank_sfc')
 
 
 # abstract
@@ -489,6 +489,82 @@ These are as returned by :meth:`engine.game.World.draw`.
     return rects if rects else False
 
 
+def _union_waste (a, b):
+    # area of the union of two (left, top, right, bottom) rects, minus the
+    # areas of the rects
+    return ((max(a[2], b[2]) - min(a[0], b[0])) *
+            (max(a[3], b[3]) - min(a[1], b[1])) -
+            (a[2] - a[0]) * (a[3] - a[1]) - (b[2] - b[0]) * (b[3] - b[1]))
+
+
+def _union (a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]),
+            max(a[3], b[3]))
+
+
+# number of recently placed rects coalesce_rects tries merging each rect with
+_COALESCE_WINDOW = 16
+
+
+def coalesce_rects (rects, rect_cost=0, max_rects=None):
+    """Merge rects to reduce their number.
+
+coalesce_rects(rects, rect_cost=0[, max_rects]) -> merged
+
+:arg rects: a sequence of Pygame-style rects, such as dirty rects as returned
+            by :meth:`engine.game.World.draw`.
+:arg rect_cost: the cost of handling each separate rect, in pixels' worth.  Two
+                rects are merged into the smallest rect containing both if its
+                area is no more than their total area plus this amount.
+:arg max_rects: if, after merging, more than this many rects remain, the area
+                they cover is split into a grid of at most this many cells, and
+                the rects with their centres in each cell are merged.
+
+:return: a list of ``pygame.Rect`` instances covering every point in ``rects``.
+         Rects with no area are discarded.
+
+The work done is bounded: rects are swept from left to right, and each is only
+tried against a few of the nearest rects placed before it, so some rects that
+would be worth merging may not be.  The time taken is ``O(n log n)`` in the
+number of rects.
+
+"""
+    rs = [(x, y, x + w, y + h) for x, y, w, h in rects if w > 0 and h > 0]
+    # the second pass catches merges made possible by rects growing
+    for sweep in (0, 1):
+        rs.sort()
+        out = []
+        # indices in out of the most recently placed rects
+        recent = deque(maxlen=_COALESCE_WINDOW)
+        for r in rs:
+            for i in reversed(recent):
+                if _union_waste(r, out[i]) <= rect_cost:
+                    out[i] = _union(r, out[i])
+                    break
+            else:
+                recent.append(len(out))
+                out.append(r)
+        done = len(out) == len(rs)
+        rs = out
+        if done:
+            break
+    # bound the number of rects by merging those near each other
+    if max_rects is not None and len(rs) > max_rects:
+        n = max(int(max_rects ** .5), 1)
+        l = min(r[0] for r in rs)
+        t = min(r[1] for r in rs)
+        cw = float(max(r[2] for r in rs) - l) / n
+        ch = float(max(r[3] for r in rs) - t) / n
+        cells = {}
+        for r in rs:
+            cell = (min(int(((r[0] + r[2]) / 2. - l) / cw), n - 1),
+                    min(int(((r[1] + r[3]) / 2. - t) / ch), n - 1))
+            c = cells.get(cell)
+            cells[cell] = r if c is None else _union(c, r)
+        rs = cells.values()
+    return [Rect(l, t, r - l, b - t) for l, t, r, b in rs]
+
+
 def blank_sfc (size):
     """Create a transparent surface with the given ``(width, height)`` size."""
     sfc = pg.Surface(size).convert_alpha()
@@ -8,8 +8,6 @@ if os.name == 'nt':
 from game import engine, EntryWorld
 
 if __name__ == '__main__':
-    engine.init()
-
     args = []
     if len(argv) > 1:
         # got some command-line arguments
@@ -19,6 +17,14 @@ if __name__ == '__main__':
         op.add_option('-p', '--profile', action = 'store_true')
         op.add_option('-t', '--time', action = 'store', type = 'float',
                       help = 'float seconds to run for')
+        op.add_option('-u', '--unthrottled', action = 'store_true',
+                      help = 'run frames as fast as possible; time passed ' \
+                      '(as for -t) is then simulated')
+        op.add_option('-l', '--headless', action = 'store_true',
+                      help = 'don\'t open a window or draw anything')
+        op.add_option('-c', '--profile-callbacks', action = 'store',
+                      type = 'float', help = 'record time spent in each ' \
+                      'callback, and show stats every this many seconds')
         op.add_option('-n', '--num-stats', action = 'store', type = 'int',
                       help = 'number of functions to show when profiling; ' \
                       'defaults to 30')
@@ -27,12 +33,21 @@ if __name__ == '__main__':
         op.add_option('-s', '--sort-stats', action = 'store', type = 'string',
                       help = 'profile stats sort mode; defaults to ' \
                       '\'cumulative\' (see pstats.Stats.sort_stats doc)')
-        op.set_defaults(debug = False, time = None, num_stats = 30,
+        op.set_defaults(debug = False, time = None, unthrottled = False,
+                        headless = False, num_stats = 30,
                         profile_file = '.profile_stats',
                         sort_stats = 'cumulative')
         options, argv = op.parse_args()
         # debug
         engine.conf.DEBUG = options.debug
+        # simulation
+        engine.conf.VIRTUAL_TIME = options.unthrottled
+        engine.conf.HEADLESS = options.headless
+        # callback profiling
+        if options.profile_callbacks is not None:
+            engine.conf.PROFILE_CALLBACKS = True
+            engine.conf.PROFILE_DUMP_INTERVAL = options.profile_callbacks
+        engine.init()
         # construct world args
         # run game
         if options.profile:
@@ -49,6 +64,7 @@ if __name__ == '__main__':
         else:
             engine.game.run(EntryWorld, *args, t = options.time)
     else:
+        engine.init()
         engine.game.run(EntryWorld, *args)
 
     engine.quit()
@@ -0,0 +1,173 @@
+"""Tests for GraphicsManager.
+
+Scenes of solid rects of colour are drawn over a number of frames, changing
+between frames, and the result is checked against drawing the scene from
+scratch.
+
+"""
+
+import sys
+import os
+import random
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame as pg
+
+from game.engine.gfx import GraphicsManager, Colour, Sprite
+
+SIZE = (40, 30)
+N_LAYERS = 20
+
+
+def setUpModule ():
+    # converting surfaces needs a display mode
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pg.display.init()
+    pg.display.set_mode((1, 1))
+
+
+def tearDownModule ():
+    pg.display.quit()
+
+
+def random_rect (rand):
+    w = rand.randint(1, 16)
+    h = rand.randint(1, 12)
+    return pg.Rect(rand.randint(-w // 2, SIZE[0] - w // 2),
+                   rand.randint(-h // 2, SIZE[1] - h // 2), w, h)
+
+
+def random_colour (rand):
+    return (rand.randint(0, 255), rand.randint(0, 255), rand.randint(0, 255))
+
+
+def mk_scene (seed, n=12):
+    """Create a random scene.
+
+mk_scene(seed, n=12) -> graphics
+
+Each graphic is in its own layer, since the order graphics in the same layer
+are drawn in is undefined.  The backmost layer has a rect covering the screen.
+
+"""
+    rand = random.Random(seed)
+    gs = [Colour((0, 0, 0), ((0, 0), SIZE), N_LAYERS)]
+    for l in rand.sample(xrange(N_LAYERS), n):
+        gs.append(Colour(random_colour(rand), random_rect(rand), l))
+    return gs
+
+
+def change_scene (rand, gs):
+    """Randomly move, resize and recolour some graphics in a scene."""
+    for i in xrange(rand.randint(0, 4)):
+        g = rand.choice(gs[1:])
+        c = rand.random()
+        if c < .5:
+            g.move_by(rand.randint(-4, 4), rand.randint(-4, 4))
+        elif c < .75:
+            g.rect = random_rect(rand)
+        else:
+            g.colour = random_colour(rand)
+
+
+def change_positions (rand, gm, gs):
+    """Randomly move, resize, show, hide, remove and add back some graphics
+in a scene, and maybe scroll it."""
+    for i in xrange(rand.randint(0, 4)):
+        g = rand.choice(gs)
+        c = rand.random()
+        if c < .4:
+            g.move_by(rand.randint(-6, 6), rand.randint(-6, 6))
+        elif c < .55 and isinstance(g, Colour):
+            g.rect = random_rect(rand)
+        elif c < .7:
+            g.visible = not g.visible
+        elif c < .85:
+            gm.rm(g)
+        else:
+            gm.add(g)
+    if rand.random() < .2:
+        gm.offset = (rand.randint(-8, 8), rand.randint(-8, 8))
+
+
+def pixels (sfc):
+    w, h = sfc.get_size()
+    return [tuple(sfc.get_at((x, y))) for x in xrange(w) for y in xrange(h)]
+
+
+def redraw (gs):
+    """Draw copies of graphics from scratch, returning the surface's pixels."""
+    gm = GraphicsManager(None, SIZE)
+    gm.add(*(Colour(g.colour, g.rect, g.layer) for g in gs))
+    return pixels(gm.orig_sfc)
+
+
+class GraphicsManagerTestCase (unittest.TestCase):
+    n_scenes = 10
+    n_frames = 20
+
+    def check_frames (self, seed, static_layers=()):
+        gs = mk_scene(seed)
+        gm = GraphicsManager(None, SIZE)
+        gm.static_layers = set(static_layers)
+        gm.add(*gs)
+        rand = random.Random(seed)
+        for frame in xrange(self.n_frames):
+            gm.draw(False)
+            self.assertEqual(pixels(gm.orig_sfc), redraw(gs),
+                             'scene {0}, frame {1}'.format(seed, frame))
+            change_scene(rand, gs)
+        return (gm, gs)
+
+    def test_matches_redraw (self):
+        """Drawing only changed areas gives the same result as redrawing."""
+        for seed in xrange(self.n_scenes):
+            self.check_frames(seed)
+
+    def test_static_layers (self):
+        """Drawing with static layers cached gives the same result as
+redrawing."""
+        for seed in xrange(self.n_scenes):
+            self.check_frames(seed, xrange(N_LAYERS // 2, N_LAYERS + 1))
+
+
+class GraphicsInTestCase (unittest.TestCase):
+    n_scenes = 10
+    n_frames = 30
+
+    def test_graphics_in (self):
+        """graphics_in finds what was drawn after graphics change."""
+        view = pg.Rect((0, 0), SIZE)
+        for seed in xrange(self.n_scenes):
+            rand = random.Random(seed)
+            gm = GraphicsManager(None, SIZE)
+            gs = []
+            for l in rand.sample(xrange(N_LAYERS), 12):
+                if rand.random() < .5:
+                    gs.append(Colour(random_colour(rand), random_rect(rand), l))
+                else:
+                    sfc = pg.Surface(random_rect(rand).size)
+                    gs.append(Sprite(sfc, random_rect(rand).topleft, l))
+            gm.add(*gs)
+            for frame in xrange(self.n_frames):
+                gm.draw(False)
+                drawn = sorted((g for l in gm.layers for g in gm.graphics[l]
+                                if g.was_visible),
+                               key=lambda g: g.layer)
+                for g in drawn:
+                    self.assertTrue(g.visible)
+                    self.assertTrue(g.postrot_rect.colliderect(view))
+                for i in xrange(5):
+                    r = random_rect(rand)
+                    self.assertEqual(
+                        gm.graphics_in(r),
+                        [g for g in drawn if g.postrot_rect.colliderect(r)],
+                        'scene {0}, frame {1}'.format(seed, frame)
+                    )
+                change_positions(rand, gm, gs)
+
+
+if __name__ == '__main__':
+    unittest.main()
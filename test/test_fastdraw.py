@@ -0,0 +1,201 @@
+"""Conformance tests for the fastdraw compositor.
+
+The pure-Python implementation is checked against a full redraw of randomised
+scenes, and the ``_gm`` extension, if it has been built, is checked against the
+pure-Python implementation.
+
+"""
+
+import sys
+import os
+import random
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pygame import Rect
+
+from game.engine.gfx import _fastdraw
+try:
+    from game.engine.gfx import _gm
+except ImportError:
+    _gm = None
+
+SCREEN = Rect(0, 0, 48, 36)
+
+
+class Box (object):
+    """A fake graphic that draws a rect of a single colour.
+
+Box(colour, rect, opaque)
+
+Pixels are drawn to a ``{(x, y): pixel}`` dict: an opaque box sets them to its
+colour, and a translucent box sets them to ``(colour, previous pixel)``, so the
+result depends on the order things are drawn in.
+
+"""
+
+    def __init__ (self, colour, rect, opaque):
+        self.colour = colour
+        self.rect = Rect(rect)
+        self.opaque = opaque
+        self.visible = True
+        self.was_visible = False
+        self.changed = False
+        self._postrot_rect = Rect(rect)
+        self._last_postrot_rect = Rect(rect)
+        self._dirty = []
+
+    def _pre_draw (self):
+        # as Graphic does
+        if self.rect != self._postrot_rect or self.changed:
+            self._dirty = [self._last_postrot_rect, self.rect]
+            self._postrot_rect = self.rect
+        else:
+            self._dirty = []
+        self.changed = False
+
+    def _opaque_in (self, rect):
+        # a hidden box draws nothing
+        return (self.visible and self.opaque and
+                self._postrot_rect.contains(rect))
+
+    def paint (self, sfc, rect):
+        for x in xrange(rect.left, rect.right):
+            for y in xrange(rect.top, rect.bottom):
+                sfc[(x, y)] = (self.colour if self.opaque
+                               else (self.colour, sfc.get((x, y))))
+
+    def _draw (self, sfc, rects):
+        for r in rects:
+            assert self._postrot_rect.contains(r), (self._postrot_rect, r)
+            self.paint(sfc, r)
+        self._last_postrot_rect = self._postrot_rect
+
+
+def mk_scene (seed, n_layers=4, n_boxes=12):
+    """Create a random scene.
+
+mk_scene(seed, n_layers=4, n_boxes=12) -> (layers, graphics)
+
+The backmost layer has an opaque box covering the screen.  As in
+:class:`GraphicsManager <engine.gfx.container.GraphicsManager>`, no layer is
+empty.
+
+"""
+    rand = random.Random(seed)
+    layers = range(n_layers)
+    graphics = dict((l, []) for l in layers)
+    graphics[layers[-1]].append(Box('bg', SCREEN, True))
+    for i in xrange(n_boxes):
+        box = Box(i, random_rect(rand), rand.random() < .5)
+        graphics[rand.choice(layers)].append(box)
+    layers = [l for l in layers if graphics[l]]
+    return (layers, dict((l, graphics[l]) for l in layers))
+
+
+def random_rect (rand):
+    w = rand.randint(1, 16)
+    h = rand.randint(1, 12)
+    return Rect(rand.randint(-w // 2, SCREEN.w - w // 2),
+                rand.randint(-h // 2, SCREEN.h - h // 2), w, h)
+
+
+def change_scene (rand, graphics):
+    """Randomly move, recolour, show and hide some boxes in a scene."""
+    boxes = [g for gs in graphics.itervalues() for g in gs if g.colour != 'bg']
+    for i in xrange(rand.randint(0, 4)):
+        box = rand.choice(boxes)
+        c = rand.random()
+        if c < .4:
+            box.rect = box.rect.move(rand.randint(-4, 4), rand.randint(-4, 4))
+        elif c < .6:
+            box.rect = random_rect(rand)
+        elif c < .8:
+            box.colour = (box.colour, 'new')
+            box.changed = True
+        else:
+            box.visible = not box.visible
+
+
+def redraw (layers, graphics):
+    """Draw a scene from scratch, returning the pixels on the screen."""
+    sfc = {}
+    for l in reversed(layers):
+        for g in graphics[l]:
+            if g.visible:
+                g.paint(sfc, g.rect.clip(SCREEN))
+    return sfc
+
+
+def on_screen (sfc):
+    return dict((p, px) for p, px in sfc.iteritems()
+                if SCREEN.collidepoint(p))
+
+
+def points (rects):
+    return set((x, y) for r in rects or ()
+               for x in xrange(r.left, r.right)
+               for y in xrange(r.top, r.bottom))
+
+
+class FastdrawTestCase (unittest.TestCase):
+    n_scenes = 20
+    n_frames = 30
+
+    def test_matches_redraw (self):
+        """Drawing only changed areas gives the same result as redrawing."""
+        for seed in xrange(self.n_scenes):
+            layers, graphics = mk_scene(seed)
+            rand = random.Random(seed)
+            sfc = {}
+            for frame in xrange(self.n_frames):
+                before = on_screen(sfc)
+                drawn = _fastdraw.fastdraw(layers, sfc, graphics, [])
+                after = on_screen(sfc)
+                self.assertEqual(after, redraw(layers, graphics),
+                                 'scene {0}, frame {1}'.format(seed, frame))
+                changed = set(p for p in set(before) | set(after)
+                              if before.get(p) != after.get(p))
+                self.assertTrue(changed <= points(drawn),
+                                'scene {0}, frame {1}'.format(seed, frame))
+                for gs in graphics.itervalues():
+                    for g in gs:
+                        self.assertEqual(g.was_visible, g.visible)
+                change_scene(rand, graphics)
+
+    def test_disjoint (self):
+        """mk_disjoint covers exactly the requested area."""
+        rand = random.Random(0)
+        for i in xrange(200):
+            add = [random_rect(rand) for j in xrange(rand.randint(0, 6))]
+            rm = [random_rect(rand) for j in xrange(rand.randint(0, 6))]
+            rs = _fastdraw.mk_disjoint(add, rm)
+            self.assertEqual(points(rs), points(add) - points(rm))
+            self.assertEqual(sum(r.w * r.h for r in rs), len(points(rs)))
+
+    @unittest.skipIf(_gm is None, '_gm extension not built')
+    def test_matches_extension (self):
+        """The pure-Python compositor behaves exactly like _gm."""
+        for seed in xrange(self.n_scenes):
+            scenes = [mk_scene(seed), mk_scene(seed)]
+            rands = [random.Random(seed), random.Random(seed)]
+            sfcs = [{}, {}]
+            for frame in xrange(self.n_frames):
+                results = []
+                for fastdraw, (layers, graphics), sfc in zip(
+                    (_gm.fastdraw, _fastdraw.fastdraw), scenes, sfcs
+                ):
+                    drawn = fastdraw(layers, sfc, graphics, [])
+                    results.append((points(drawn) if drawn else drawn, sfc,
+                                    [(g._dirty, g.was_visible,
+                                      g._last_postrot_rect)
+                                     for l in layers for g in graphics[l]]))
+                self.assertEqual(results[0], results[1],
+                                 'scene {0}, frame {1}'.format(seed, frame))
+                for rand, (layers, graphics) in zip(rands, scenes):
+                    change_scene(rand, graphics)
+
+
+if __name__ == '__main__':
+    unittest.main()
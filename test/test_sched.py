@@ -0,0 +1,256 @@
+"""Tests for the scheduler.
+
+Frames are run by calling the scheduler's per-frame update directly, so time
+passes by exactly one frame each call, without waiting.
+
+"""
+
+import sys
+import os
+import unittest
+from time import sleep
+from timeit import default_timer as time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.engine.sched import (Timer, Scheduler, BakedCurve, interp_linear,
+                                interp_bezier, ease_bezier)
+
+
+def run_until (s, cond, max_frames):
+    """Run frames until a condition is true.
+
+run_until(s, cond, max_frames) -> frames
+
+:arg s: scheduler.
+:arg cond: function taking no arguments, called after each frame.
+:arg max_frames: stop after this many frames if ``cond`` is still false.
+
+:return: the number of frames run, or ``None`` if ``cond`` never became true.
+
+"""
+    for frame in xrange(1, max_frames + 1):
+        s._update()
+        if cond():
+            return frame
+    return None
+
+
+def run_frames (s, frames):
+    for frame in xrange(frames):
+        s._update()
+
+
+class Obj (object):
+    def __init__ (self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class VirtualTimeTestCase (unittest.TestCase):
+    def test_no_sleep (self):
+        """With a virtual clock, frames run without waiting."""
+        timer = Timer(60)
+        timer.virtual_time = True
+        frames = []
+        start = time()
+        timer.run(lambda: frames.append(timer.t), seconds=10)
+        self.assertLess(time() - start, 5)
+        self.assertEqual(len(frames), 600)
+        self.assertAlmostEqual(timer.t, 10)
+        self.assertEqual(list(timer.frame_times), [timer.frame] * 600)
+
+    def test_slow_frames (self):
+        """With a virtual clock, slow frames still count as one frame."""
+        s = Scheduler(200)
+        s.virtual_time = True
+        frames = []
+        # each frame takes twice as long as it should
+        s.add_timeout(lambda: frames.append(sleep(.01)) or True, frames=1)
+        cd = s.countdown(.1).reset()
+        ended = []
+        cd.cb(lambda: ended.append(len(frames)))
+        s.run(seconds=.2)
+        self.assertEqual(len(frames), 40)
+        self.assertEqual(len(ended), 1)
+        self.assertAlmostEqual(ended[0], 20, delta=1)
+
+
+class CounterTestCase (unittest.TestCase):
+    def setUp (self):
+        self.s = Scheduler(60)
+
+    def assertFrames (self, frames, expected):
+        # time is a sum of frame lengths, so may be out by a frame
+        self.assertIsNotNone(frames)
+        self.assertAlmostEqual(frames, expected, delta=1)
+
+    def test_limit (self):
+        """A counter finishes when it reaches its limit."""
+        c = self.s.counter(1).reset()
+        self.assertFrames(run_until(self.s, lambda: c, 120), 60)
+        self.assertEqual(c.t, 1)
+
+    def test_change_limit (self):
+        """Changing the limit of a running counter counts on from where it
+is."""
+        c = self.s.counter(10).reset()
+        run_frames(self.s, 300)
+        self.assertFalse(c)
+        c.limit = 6
+        self.assertAlmostEqual(c.t, 5)
+        self.assertFrames(run_until(self.s, lambda: c, 600), 60)
+        self.assertEqual(c.t, 6)
+
+    def test_change_limit_paused (self):
+        """Changing the limit of a paused counter counts on from where it was
+paused."""
+        c = self.s.counter(10).reset()
+        run_frames(self.s, 120)
+        c.pause()
+        run_frames(self.s, 120)
+        c.limit = 3
+        c.unpause()
+        self.assertFrames(run_until(self.s, lambda: c, 600), 60)
+
+
+class BakedCurveTestCase (unittest.TestCase):
+    def assertCurvesEqual (self, f, g, t, places=7):
+        # unbaked curves must be called with increasing times
+        for i in xrange(101):
+            self.assertAlmostEqual(f(t * i / 100.), g(t * i / 100.), places)
+
+    def test_linear (self):
+        """A baked linear curve matches the unbaked curve and its end."""
+        waypoints = (0, 4, (10, 1))
+        curve = interp_linear(*waypoints, bake=3)
+        self.assertIsInstance(curve, BakedCurve)
+        self.assertCurvesEqual(curve, interp_linear(*waypoints), 1)
+        self.assertEqual(curve.final, 10)
+        self.assertIsNone(curve(1.01))
+        # looking up values doesn't use anything up
+        self.assertEqual(curve(.5), 4)
+
+    def test_nested (self):
+        """Baked values keep their structure and non-number objects."""
+        curve = interp_linear([(0, 0), 'a'], [((10, 20), 'a'), 2], bake=5)
+        self.assertEqual(curve(1), [[5, 10], 'a'])
+        self.assertEqual(curve.final, [[10, 20], 'a'])
+
+    def test_arc_length (self):
+        """A curve reparameterised by arc length moves at constant speed."""
+        curve = interp_linear((0, 0), ((10, 0), 1), ((10, 30), 2), bake=201,
+                              arc_length=True)
+        # halfway in time is halfway along, rather than at the corner
+        x, y = curve(1)
+        self.assertAlmostEqual(x, 10, 5)
+        self.assertAlmostEqual(y, 10, 5)
+        self.assertEqual(curve.final, [10, 30])
+
+    def test_bezier (self):
+        """Baked Bézier curves are close to the unbaked curves."""
+        self.assertCurvesEqual(interp_bezier(0, 3, 1, bake=257),
+                               interp_bezier(0, 3, 1), 1, 4)
+        ease = ease_bezier(0, .1, .9, 1, bake=257)
+        self.assertCurvesEqual(ease, ease_bezier(0, .1, .9, 1), 1, 4)
+        self.assertEqual(ease(1), 1)
+
+    def test_interp (self):
+        """Interpolating with a baked curve sets its final value, then
+stops."""
+        s = Scheduler(60)
+        obj = Obj(x=0)
+        s.interp(interp_linear(0, (10, .5), bake=7), (obj, 'x'))
+        run_frames(s, 40)
+        self.assertEqual(obj.x, 10)
+        obj.x = -1
+        run_frames(s, 10)
+        self.assertEqual(obj.x, -1)
+
+
+class DomainTestCase (unittest.TestCase):
+    def setUp (self):
+        self.s = Scheduler(60)
+
+    def interps (self, domain):
+        # a plain and a batched interpolation in a domain
+        objs = [Obj(x=0), Obj(x=0)]
+        for obj, batched in zip(objs, (False, True)):
+            self.s.interp_simple(obj, 'x', 50, 1, batched=batched,
+                                 domain=domain)
+        return objs
+
+    def test_pause_other (self):
+        """Pausing a domain doesn't affect interpolations in other domains."""
+        objs = self.interps('world')
+        self.s.domain().pause()
+        run_frames(self.s, 90)
+        self.assertEqual([obj.x for obj in objs], [50, 50])
+
+    def test_pause (self):
+        """Pausing a domain stops interpolations in it."""
+        objs = self.interps('world')
+        default_objs = self.interps(None)
+        run_frames(self.s, 30)
+        self.s.domain('world').pause()
+        xs = [obj.x for obj in objs]
+        run_frames(self.s, 90)
+        self.assertEqual([obj.x for obj in objs], xs)
+        self.assertEqual([obj.x for obj in default_objs], [50, 50])
+        self.s.domain('world').unpause()
+        run_frames(self.s, 60)
+        self.assertEqual([obj.x for obj in objs], [50, 50])
+
+    def test_scale (self):
+        """Scaling a domain scales the speed of interpolations in it."""
+        self.s.domain('world').scale = .5
+        objs = self.interps('world')
+        run_frames(self.s, 90)
+        self.assertTrue(all(0 < obj.x < 50 for obj in objs))
+        run_frames(self.s, 60)
+        self.assertEqual([obj.x for obj in objs], [50, 50])
+
+    def test_spawn_paused (self):
+        """Tasks waiting for the next frame run while domains are paused."""
+        steps = []
+
+        def task ():
+            for i in xrange(3):
+                steps.append(i)
+                yield None
+
+        self.s.domain().pause()
+        done = self.s.spawn(task())
+        run_frames(self.s, 3)
+        self.assertEqual(steps, [0, 1, 2])
+        self.assertTrue(done.done)
+
+    def test_counter_domain (self):
+        """Countdowns and counters store their domain's name, and follow
+pausing."""
+        self.s.domain('world')
+        cd = self.s.countdown(1, domain='world').reset()
+        c = self.s.counter(domain='world').reset()
+        self.assertEqual((cd.domain, c.domain), ('world', 'world'))
+        run_frames(self.s, 30)
+        self.s.domain('world').pause()
+        run_frames(self.s, 60)
+        self.assertFalse(cd)
+        self.assertAlmostEqual(c.t, .5)
+        self.s.domain('world').unpause()
+        self.assertIsNotNone(run_until(self.s, lambda: cd, 31))
+
+    def test_counter_change_domain (self):
+        """Changing a counter's domain keeps its count."""
+        self.s.domain('world').pause()
+        c = self.s.counter().reset()
+        run_frames(self.s, 30)
+        c.domain = 'world'
+        run_frames(self.s, 30)
+        self.assertAlmostEqual(c.t, .5)
+        c.domain = None
+        run_frames(self.s, 30)
+        self.assertAlmostEqual(c.t, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Tests for the surface pool and the transformation cache."""
+
+import sys
+import os
+import unittest
+from threading import Thread
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame as pg
+
+from game.engine.gfx.util import SurfacePool, TransformCache
+from game.engine.res import _measure_img
+
+
+def setUpModule ():
+    # converting surfaces needs a display mode
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pg.display.init()
+    pg.display.set_mode((1, 1))
+
+
+def tearDownModule ():
+    pg.display.quit()
+
+
+class SurfacePoolTestCase (unittest.TestCase):
+    def setUp (self):
+        self.pool = SurfacePool(2 ** 20)
+
+    def test_reuse (self):
+        """Surfaces given back are handed out again."""
+        pool = self.pool
+        sfc = pool.get((4, 4), False, 'a')
+        self.assertEqual(pool.owner(sfc), 'a')
+        pool.put(sfc)
+        self.assertIsNone(pool.owner(sfc))
+        self.assertIs(pool.get((4, 4), False, 'b'), sfc)
+        self.assertIsNot(pool.get((4, 4), True), sfc)
+
+    def test_claim (self):
+        """Claimed surfaces are recorded but not kept."""
+        pool = self.pool
+        sfc = pg.Surface((4, 4))
+        pool.claim(sfc, 'a')
+        self.assertEqual(pool.owner(sfc), 'a')
+        pool.put(sfc)
+        self.assertIsNone(pool.owner(sfc))
+        self.assertIsNot(pool.get((4, 4)), sfc)
+
+    def test_threads (self):
+        """Using the pool from several threads keeps it consistent."""
+        pool = self.pool
+        errors = []
+
+        def work (n):
+            try:
+                for i in xrange(500):
+                    sfcs = [pool.get((4, 4 + i % 3), i % 2, (n, i))
+                            for j in xrange(3)]
+                    sfcs.append(pg.Surface((4, 4)))
+                    pool.claim(sfcs[-1], (n, i))
+                    for sfc in sfcs:
+                        if pool.owner(sfc) != (n, i):
+                            raise AssertionError('wrong owner')
+                        pool.put(sfc)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [Thread(target=work, args=(n,)) for n in xrange(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(pool.size, sum(_measure_img(sfc)
+                                        for sfcs in pool._sfcs.itervalues()
+                                        for sfc in sfcs))
+
+
+class TransformCacheTestCase (unittest.TestCase):
+    def setUp (self):
+        self.cache = TransformCache(2 ** 20)
+        self.src = pg.Surface((4, 4))
+
+    def test_get (self):
+        """Stored results are returned for the same source and key."""
+        cache = self.cache
+        result = pg.Surface((8, 8))
+        self.assertIsNone(cache.get(self.src, 'resize', (8, 8)))
+        cache.put(self.src, result, 'resize', (8, 8))
+        self.assertIs(cache.get(self.src, 'resize', (8, 8)), result)
+        self.assertIsNone(cache.get(self.src, 'resize', (2, 2)))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_touch (self):
+        """Results aren't returned after their source is altered."""
+        cache = self.cache
+        cache.put(self.src, pg.Surface((8, 8)), 'resize', (8, 8))
+        cache.touch(self.src)
+        self.assertIsNone(cache.get(self.src, 'resize', (8, 8)))
+
+    def test_clear (self):
+        """Results dropped by clearing the cache are no longer shared."""
+        cache = self.cache
+        result = pg.Surface((8, 8))
+        cache.put(self.src, result, 'resize', (8, 8))
+        self.assertTrue(cache.shared(result))
+        cache.clear()
+        self.assertFalse(cache.shared(result))
+        self.assertIsNone(cache.get(self.src, 'resize', (8, 8)))
+        self.assertEqual(cache.size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()